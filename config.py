@@ -1,7 +1,55 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str  # Will be read from environment variables
+    ASYNC_DATABASE_URL: str = ""  # Empty = DATABASE_URL with its async driver (aiomysql/aiosqlite)
+
+    # Connection pools of the sync and async engines (not used for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reconnect before MySQL's wait_timeout drops idle connections
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+
+    # POST /candidates/bulk
+    CANDIDATE_IMPORT_CHUNK_SIZE: int = 1000  # Rows validated, inserted and committed together
+    CANDIDATE_IMPORT_MAX_ERRORS: int = 1000  # Row errors returned, later ones are only counted
+
+    # Online scoring
+    PREDICTION_MODEL_PATH: str = "models/random_forest_model.joblib"  # Relative to predict/
+    PREDICTION_MAX_WORKERS: int = 2  # Threads running sklearn/SHAP work
+    PREDICTION_MAX_CONCURRENCY: int = 8  # Scoring requests admitted at once, including queued ones
+    PREDICTION_TIMEOUT_SECONDS: float = 10.0
+    PREDICTION_MAX_BATCH_SIZE: int = 500
+    # How summaries are explained. "path" reads the memory-mapped compiled trees every worker
+    # shares; "shap" gives exact SHAP values but unpickles the sklearn model and builds a
+    # TreeExplainer in every worker, a private copy of the forest per process
+    PREDICTION_EXPLANATION: Literal["shap", "path", "none"] = "path"
+
+    # Model registry; PREDICTION_MODEL_PATH is served until a version is made current
+    MODEL_REGISTRY_DIR: str = "models/registry"  # Relative to predict/
+    MODEL_REGISTRY_MODEL_NAME: str = "random_forest"
+    MODEL_REGISTRY_POLL_SECONDS: float = 10.0  # How often CURRENT is checked for a new version, 0 = never
+
+    # Micro-batching of concurrent single-candidate predictions
+    PREDICTION_SCHEDULER_MAX_BATCH_SIZE: int = 64  # Rows per coalesced batch
+    PREDICTION_SCHEDULER_MAX_WAIT_MS: float = 5.0  # Longest a request waits for its batch to fill
+    PREDICTION_SCHEDULER_MAX_QUEUE_SIZE: int = 1000
+
+    # Prediction cache keyed by feature row, company weights and model version
+    PREDICTION_CACHE_MAX_SIZE: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: float = 0.0  # 0 = entries never expire
+    PREDICTION_CACHE_PATH: str = ""  # SQLite file keeping the cache across restarts, empty = memory only
+    PREDICTION_CACHE_MAX_DISK_SIZE: int = 1000000  # Rows kept in the SQLite file, oldest pruned first
+
+    # Background re-scoring after company weight changes
+    RESCORE_CHUNK_SIZE: int = 1000  # Candidates scored and committed together
+    RESCORE_LEASE_SECONDS: float = 300.0  # A running job without a heartbeat for this long is taken over; > chunk time
+
+    # Compiled company weights are invalidated on change; the TTL (0 = never) covers other workers
+    COMPANY_WEIGHTS_CACHE_TTL_SECONDS: float = 300.0
 
     class Config:
         env_file = ".env"  # Specify the environment file
@@ -9,4 +57,3 @@ class Settings(BaseSettings):
 
 # Load settings
 settings = Settings()
-
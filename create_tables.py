@@ -1,9 +1,87 @@
+from sqlalchemy import and_, delete, exists, insert, inspect, or_, select
+from sqlalchemy.orm import aliased
+
 from db import Base, engine
 from models import models
+from models.company import CompanyFactor
+from models.factor import Factor
+from models.models import CandidateFactor
+from models.models import create_candidate_search_index
 from models import company
 from models import factor
+from models import feature
+from models import prediction
+from models.prediction import CandidateOutcome, CandidatePrediction
 from models import user
 
+
+def collapse_prediction_history(connection, batch_size=1000):
+    """
+    Keep only the latest candidate_predictions row per company and candidate, as needed
+    for the unique index on them; earlier versions stored every score ever computed.
+    """
+    if "uq_candidate_predictions_company_candidate" in {
+        index["name"] for index in inspect(connection).get_indexes("candidate_predictions")
+    }:
+        return
+    latest, newer = aliased(CandidatePrediction), aliased(CandidatePrediction)
+    superseded = select(latest.prediction_id).where(exists().where(
+        newer.company_id == latest.company_id,
+        newer.candidate_id == latest.candidate_id,
+        or_(
+            newer.created_at > latest.created_at,
+            and_(newer.created_at == latest.created_at, newer.prediction_id > latest.prediction_id),
+        ),
+    ))
+    # Collected first, MySQL cannot delete from a table its subquery reads
+    prediction_ids = connection.execute(superseded).scalars().all()
+    for start in range(0, len(prediction_ids), batch_size):
+        connection.execute(delete(CandidatePrediction).where(
+            CandidatePrediction.prediction_id.in_(prediction_ids[start:start + batch_size])
+        ))
+
+
+def move_outcome_factor(connection, factor_name="Expected_Joining_Score"):
+    """
+    Move observed outcomes out of the candidate factor earlier versions recorded them
+    as into candidate_outcomes, and drop that factor so it can no longer be weighted.
+    """
+    factor_id = connection.execute(
+        select(Factor.factor_id).where(Factor.factor_name == factor_name)
+    ).scalar_one_or_none()
+    if factor_id is None:
+        return
+    rows = connection.execute(
+        select(CandidateFactor.candidate_factor_id, CandidateFactor.candidate_id, CandidateFactor.factor_value,
+               CandidateFactor.created_at)
+        .where(CandidateFactor.factor_id == factor_id)
+    ).all()
+    if rows:
+        connection.execute(insert(CandidateOutcome), [
+            {"outcome_id": row.candidate_factor_id, "candidate_id": row.candidate_id,
+             "score": float(row.factor_value), "observed_at": row.created_at}
+            for row in rows
+        ])
+    connection.execute(delete(CandidateFactor).where(CandidateFactor.factor_id == factor_id))
+    connection.execute(delete(CompanyFactor).where(CompanyFactor.factor_id == factor_id))
+    connection.execute(delete(Factor).where(Factor.factor_id == factor_id))
+
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# Scores stored before candidate_predictions kept one row per company and candidate
+with engine.begin() as connection:
+    collapse_prediction_history(connection)
+    # Outcomes recorded before candidate_outcomes existed
+    move_outcome_factor(connection)
+
+# create_all skips tables that already exist; add indexes introduced since they were created
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+# Full-text search index of candidates tables created before it existed
+with engine.begin() as connection:
+    create_candidate_search_index(connection)
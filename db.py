@@ -1,16 +1,56 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import DeclarativeMeta, declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-# SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Async drivers standing in for the sync ones of DATABASE_URL
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    The same database as url, through its asyncio driver (aiomysql or aiosqlite).
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _pool_options(url: str) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    # SQLite connections are pooled per file by SQLAlchemy itself
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    return options
+
+
+# SQLAlchemy engine, used by background jobs, scoring and create_tables
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL))
 
 # Create a SessionLocal class for managing database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine serving the API routes without holding a threadpool thread per request
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL))
+
+# Objects stay usable after commit; lazy loads are not available on async sessions
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base: DeclarativeMeta = declarative_base()
 
@@ -22,3 +62,7 @@ def get_db() -> Session:
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
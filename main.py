@@ -1,28 +1,67 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from typing import Optional
 
-from fastapi import FastAPI, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.models import Candidate
-from models.schema import CandidateCreate, CandidateSchema, SearchCandidateRequest, \
-    UpdateCandidateRequest
-from db import get_db
+from models.models import Candidate, CandidateStatus
+from models.schema import CandidateCreate, CandidateImportResult, CandidatePage, CandidateSchema, \
+    SearchCandidateRequest, UpdateCandidateRequest
+from db import get_async_db
 import uvicorn
 
-from routes import company, user, factor
+from config import settings
+from routes import company, user, factor, prediction, registry
+from services.candidate import InvalidCursorError, list_candidates, search_candidates
+from services.candidate_import import UnsupportedImportFormatError, import_candidates, import_format, \
+    iter_upload_rows
+from services.feature_store import invalidate_candidate_features, rebuild_candidate_features
+from services.model_serving import model_server
+from services.rescoring import resume_rescore_jobs, watch_rescore_jobs
 
-app = FastAPI()
+logger = logging.getLogger("log")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve the registry's current model version and follow later switches
+    try:
+        await run_in_threadpool(model_server.refresh)
+    except Exception:
+        logger.exception("Loading the current model version failed, serving %s", model_server.model_path)
+
+    # Pick up re-scoring jobs interrupted by the last shutdown, and later the jobs of
+    # workers that stop sending heartbeats
+    resume_rescore_jobs()
+    rescore_watcher = asyncio.create_task(watch_rescore_jobs(settings.RESCORE_LEASE_SECONDS))
+
+    watcher = None
+    if settings.MODEL_REGISTRY_POLL_SECONDS > 0:
+        watcher = asyncio.create_task(model_server.watch(settings.MODEL_REGISTRY_POLL_SECONDS))
+    yield
+    rescore_watcher.cancel()
+    if watcher is not None:
+        watcher.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(company.router, prefix="/companies", tags=["Companies"])
 app.include_router(user.router, prefix="/users", tags=["Users"])
 app.include_router(factor.router, prefix="/factor", tags=["Factors"])
+app.include_router(prediction.router, prefix="/candidates", tags=["Predictions"])
+app.include_router(registry.router, prefix="/models", tags=["Models"])
 
 
 @app.post("/candidates/")
-def create_candidate(candidate: CandidateCreate, db: Session = Depends(get_db)):
+async def create_candidate(candidate: CandidateCreate, db: AsyncSession = Depends(get_async_db)):
     if candidate.email:
-        db_candidate = db.query(Candidate).filter(Candidate.email == candidate.email).first()
+        db_candidate = await db.scalar(select(Candidate).filter(Candidate.email == candidate.email))
         if db_candidate:
             raise HTTPException(status_code=400, detail="Candidate with this email already exists")
 
@@ -40,65 +79,108 @@ def create_candidate(candidate: CandidateCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_candidate)
-    db.commit()
-    db.refresh(new_candidate)
+    await db.commit()
+    await db.refresh(new_candidate)
     return {"message": "Candidate created successfully", "candidate_id": new_candidate.candidate_id}
 
 
-@app.post("/candidates/search", response_model=List[CandidateSchema])
-def search_candidates_by_name(
+@app.post("/candidates/bulk", response_model=CandidateImportResult)
+async def bulk_create_candidates(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create candidates from a CSV (text/csv, with a header row) or NDJSON
+    (application/x-ndjson) request body with the fields of CandidateCreate.
+
+    The body is read as it streams in and imported chunk by chunk; invalid rows and
+    duplicate emails are reported per row while the other rows are created.
+
+    Args:
+        request (Request): The upload, its Content-Type selecting the format.
+        db (AsyncSession): The database session dependency.
+
+    Returns:
+        CandidateImportResult: Rows created and failed, row errors and import throughput.
+    """
+    try:
+        upload_format = import_format(request.headers.get("content-type"))
+    except UnsupportedImportFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    return await import_candidates(
+        db,
+        iter_upload_rows(request.stream(), upload_format),
+        chunk_size=settings.CANDIDATE_IMPORT_CHUNK_SIZE,
+        max_errors=settings.CANDIDATE_IMPORT_MAX_ERRORS,
+    )
+
+
+@app.post("/candidates/search", response_model=CandidatePage)
+async def search_candidates_by_name(
     request: SearchCandidateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Search for candidates by their name (case-insensitive) using request body.
+    Search candidates by name, current role, target role and location, most relevant first.
 
     Args:
-        request (SearchCandidateRequest): The request body containing the name or partial name.
-        db (Session): The database session dependency.
+        request (SearchCandidateRequest): The words to search for (prefixes match), page size and cursor.
+        db (AsyncSession): The database session dependency.
 
     Returns:
-        List[CandidateSchema]: A list of candidates matching the search criteria.
+        CandidatePage: The candidates of the page and the cursor of the next one.
     """
-    candidates = db.query(Candidate).filter(Candidate.name.ilike(f"%{request.name}%")).all()
+    try:
+        candidates, next_cursor = await search_candidates(db, request.query, request.size, cursor=request.cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if not candidates:
-        raise HTTPException(status_code=404, detail="No candidates found with the given name")
+        raise HTTPException(status_code=404, detail="No candidates found matching the search")
 
-    return candidates
+    return {"items": candidates, "next_cursor": next_cursor}
 
 
-@app.get("/candidates", response_model=List[CandidateSchema])
-def get_all_candidates(
-        page: int = Query(1, ge=1, description="Page number (must be 1 or greater)"),
+@app.get("/candidates", response_model=CandidatePage)
+async def get_all_candidates(
         size: int = Query(10, ge=1, le=100, description="Number of candidates per page (1-100)"),
-        db: Session = Depends(get_db),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page; omit for the first page"),
+        status: Optional[CandidateStatus] = Query(None, description="Only candidates with this status"),
+        target_role: Optional[str] = Query(None, description="Only candidates targeting this role"),
+        location: Optional[str] = Query(None, description="Only candidates in this location"),
+        db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Retrieve all candidates with pagination.
+    Retrieve candidates page by page, oldest first, optionally filtered.
 
     Args:
-        page (int): The current page number.
         size (int): The number of candidates per page.
-        db (Session): The database session dependency.
+        cursor (str): Opaque cursor returned as next_cursor by the previous page.
+        status (CandidateStatus): Optional status filter.
+        target_role (str): Optional target role filter.
+        location (str): Optional location filter.
+        db (AsyncSession): The database session dependency.
 
     Returns:
-        List[Candidate]: A list of candidates for the current page.
+        CandidatePage: The candidates of the page and the cursor of the next one.
     """
-    offset = (page - 1) * size
-    candidates = db.query(Candidate).offset(offset).limit(size).all()
+    try:
+        candidates, next_cursor = await list_candidates(
+            db, size, cursor=cursor, status=status, target_role=target_role, location=location
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if not candidates:
         raise HTTPException(status_code=404, detail="No candidates found")
 
-    return candidates
+    return {"items": candidates, "next_cursor": next_cursor}
 
 
 @app.put("/candidates/{candidate_id}", response_model=CandidateSchema)
-def update_candidate(
+async def update_candidate(
     candidate_id: str,
     request: UpdateCandidateRequest,
-    db: Session = Depends(get_db)  
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update candidate information by ID.
@@ -106,12 +188,13 @@ def update_candidate(
     Args:
         candidate_id (str): The ID of the candidate to update (UUID format).
         request (UpdateCandidateRequest): The request body containing fields to update.
-        db (Session): The database session dependency.
+        background_tasks (BackgroundTasks): Runs the feature row rebuild after the response.
+        db (AsyncSession): The database session dependency.
 
     Returns:
         CandidateSchema: The updated candidate information.
     """
-    candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
+    candidate = await db.scalar(select(Candidate).filter(Candidate.candidate_id == candidate_id))
 
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
@@ -119,9 +202,14 @@ def update_candidate(
     for field, value in request.model_dump(exclude_unset=True).items():
         setattr(candidate, field, value)
 
+    # Profile fields are model features too: drop the materialized row with the update,
+    # then rebuild it off the event loop once the response is sent
+    await db.run_sync(invalidate_candidate_features, [candidate_id])
+
     # Save changes to the database
-    db.commit()
-    db.refresh(candidate)
+    await db.commit()
+    await db.refresh(candidate)
+    background_tasks.add_task(rebuild_candidate_features, [candidate_id])
 
     return candidate
 
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Float
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 
 from db import Base
@@ -40,3 +40,9 @@ class CompanyFactor(Base):
     company = relationship("Company", back_populates="company_factors")
     factor = relationship("Factor", back_populates="company_factors")
 
+    # One weight per company and factor, the conflict target of set_company_factors' upsert.
+    # A unique index rather than a constraint so create_tables can add it to existing tables.
+    __table_args__ = (
+        Index("uq_company_factors_company_id_factor_id", "company_id", "factor_id", unique=True),
+    )
+
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, String
+
+from db import Base
+
+
+class CandidateFeatures(Base):
+    """
+    Materialized model input row of a candidate, pivoted from candidate_factors.
+    """
+    __tablename__ = "candidate_features"
+
+    candidate_id = Column(String(36), ForeignKey("candidates.candidate_id"), primary_key=True)
+    # Typed feature values by model column name; missing values are null
+    features = Column(JSON, nullable=False)
+    # Column layout the values were cast for; rows with another layout are rebuilt
+    layout_version = Column(String(16), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
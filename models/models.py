@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, String
+from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Index, String, event, text
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -28,6 +28,66 @@ class Candidate(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Keyset pagination in (created_at, candidate_id) order, unfiltered and per filter
+    __table_args__ = (
+        Index("ix_candidates_created_at_candidate_id", "created_at", "candidate_id"),
+        Index("ix_candidates_status_created_at", "status", "created_at", "candidate_id"),
+        Index("ix_candidates_target_role_created_at", "target_role", "created_at", "candidate_id"),
+        Index("ix_candidates_location_created_at", "location", "created_at", "candidate_id"),
+        # Full-text search on MySQL; SQLite gets the candidates_fts table below instead
+        Index("ft_candidates_search", "name", "current_role", "target_role", "location",
+              mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+
+# Columns searched by services.candidate.search_candidates
+CANDIDATE_SEARCH_COLUMNS = ("name", "current_role", "target_role", "location")
+
+_SEARCH_COLUMN_LIST = ", ".join(CANDIDATE_SEARCH_COLUMNS)
+_NEW_VALUES = ", ".join(f"new.{column}" for column in CANDIDATE_SEARCH_COLUMNS)
+_OLD_VALUES = ", ".join(f"old.{column}" for column in CANDIDATE_SEARCH_COLUMNS)
+
+# SQLite: an FTS5 index over the candidates table, kept in sync by triggers. Prefix
+# indexes on 2 and 3 characters keep short prefix queries off full term scans.
+_SQLITE_SEARCH_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+        {_SEARCH_COLUMN_LIST}, content='candidates', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS candidates_fts_insert AFTER INSERT ON candidates BEGIN
+        INSERT INTO candidates_fts(rowid, {_SEARCH_COLUMN_LIST}) VALUES (new.rowid, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS candidates_fts_delete AFTER DELETE ON candidates BEGIN
+        INSERT INTO candidates_fts(candidates_fts, rowid, {_SEARCH_COLUMN_LIST}) VALUES ('delete', old.rowid, {_OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS candidates_fts_update AFTER UPDATE OF {_SEARCH_COLUMN_LIST} ON candidates BEGIN
+        INSERT INTO candidates_fts(candidates_fts, rowid, {_SEARCH_COLUMN_LIST}) VALUES ('delete', old.rowid, {_OLD_VALUES});
+        INSERT INTO candidates_fts(rowid, {_SEARCH_COLUMN_LIST}) VALUES (new.rowid, {_NEW_VALUES});
+    END""",
+)
+
+
+def create_candidate_search_index(connection, rebuild=False):
+    """
+    Create the SQLite full-text index of candidates if missing, indexing the rows already
+    there. rebuild=True re-indexes every row, needed after a VACUUM since it may renumber
+    the rowids the index points at. Nothing to do on MySQL, which maintains its FULLTEXT
+    index itself.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'candidates_fts'")
+    ).first()
+    for statement in _SQLITE_SEARCH_DDL:
+        connection.execute(text(statement))
+    if rebuild or not exists:
+        connection.execute(text("INSERT INTO candidates_fts(candidates_fts) VALUES ('rebuild')"))
+
+
+@event.listens_for(Candidate.__table__, "after_create")
+def _create_search_index(table, connection, **kw):
+    create_candidate_search_index(connection)
+
 
 class CandidateFactor(Base):
     __tablename__ = "candidate_factors"
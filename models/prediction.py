@@ -0,0 +1,77 @@
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text
+
+from db import Base
+
+
+class CandidatePrediction(Base):
+    """
+    Latest score of a candidate for a company; scoring again replaces the row.
+    """
+    __tablename__ = "candidate_predictions"
+
+    prediction_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    candidate_id = Column(String(36), ForeignKey("candidates.candidate_id"), nullable=False)
+    company_id = Column(String(36), ForeignKey("company.company_id"), nullable=False)
+    expected_joining_score = Column(Float, nullable=False)
+    summary = Column(Text, nullable=False)
+    model_version = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # One row per company and candidate, the conflict target of save_predictions' upsert;
+        # also finds the candidates scored for a company, in keyset order
+        Index("uq_candidate_predictions_company_candidate", "company_id", "candidate_id", unique=True),
+    )
+
+
+class CandidateOutcome(Base):
+    """
+    Observed joining score of a candidate, the label of the next incremental model update.
+    """
+    __tablename__ = "candidate_outcomes"
+
+    outcome_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    candidate_id = Column(String(36), ForeignKey("candidates.candidate_id"), nullable=False)
+    score = Column(Float, nullable=False)
+    observed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # export_outcomes reads the outcomes observed after a point in time, oldest first
+        Index("ix_candidate_outcomes_observed_at", "observed_at"),
+    )
+
+
+class RescoreJobStatus(enum.Enum):
+    Pending = "Pending"
+    Running = "Running"
+    Completed = "Completed"
+    Failed = "Failed"
+    Cancelled = "Cancelled"
+
+
+class RescoreJob(Base):
+    __tablename__ = "rescore_jobs"
+
+    job_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey("company.company_id"), nullable=False)
+    status = Column(Enum(RescoreJobStatus), nullable=False, default=RescoreJobStatus.Pending)
+    total_candidates = Column(Integer, nullable=False, default=0)
+    processed_candidates = Column(Integer, nullable=False, default=0)
+    # Last candidate_id written; the job resumes after it
+    last_candidate_id = Column(String(36), nullable=True)
+    model_version = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Start of the current run and how many candidates were already done at that point
+    started_at = Column(DateTime, nullable=True)
+    processed_at_start = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    # Run that claimed the job and its last sign of life; a Running job whose heartbeat
+    # is older than RESCORE_LEASE_SECONDS is taken over by the next worker that resumes it
+    claimed_by = Column(String(36), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AliasChoices, BaseModel, EmailStr, Field
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from models.models import CandidateStatus
 
@@ -52,8 +52,30 @@ class CandidateSchema(BaseModel):
         orm_mode = True
 
 
+class CandidatePage(BaseModel):
+    items: List[CandidateSchema]
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page; None on the last page
+
+
+class CandidateImportError(BaseModel):
+    row: int  # Data row of the upload, starting at 1 (the CSV header is not counted)
+    error: str
+
+
+class CandidateImportResult(BaseModel):
+    received: int
+    created: int
+    failed: int
+    errors: List[CandidateImportError]
+    seconds: float
+    rows_per_second: float
+
+
 class SearchCandidateRequest(BaseModel):
-    name: str
+    # Words matched against name, current role, target role and location; "name" is still accepted
+    query: str = Field(..., min_length=1, max_length=255, validation_alias=AliasChoices("query", "name"))
+    size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None  # next_cursor of the previous page; omit for the first page
 
 
 class UpdateCandidateRequest(BaseModel):
@@ -0,0 +1,332 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import shap
+import sklearn
+
+from create_synthetic_data import generate_shard
+from factor_weightage import get_weightage
+from model_bundle import ENCODER_FILE_NAME, SCALER_FILE_NAME, ModelBundle, get_model_bundle, resolve_artifact_path
+from tree_engine import compiled_trees_path
+from predict import (
+    _weighted_features,
+    align_columns_with_original_values,
+    align_with_model_columns,
+    get_top_factors,
+    predict,
+    predict_with_weights_rf,
+    split_data,
+)
+
+MODEL_PATHS = {
+    "decision_tree": "models/decision_tree_model.joblib",
+    "random_forest": "models/random_forest_model.joblib",
+}
+DEFAULT_BATCH_SIZES = (1, 100, 10000, 100000)
+COMPANY = "Company_A"
+SEED = 42
+
+# Columns dropped from the live rows passed to align_columns_with_original_values
+_LIVE_DROPPED_COLUMNS = 5
+
+
+def build_cases(model_path, data):
+    """
+    Prepare the benchmarked calls for one aligned batch.
+
+    Returns:
+        list: (case name, uses SHAP, zero-argument callable) tuples.
+    """
+    bundle = get_model_bundle(model_path)
+    numerical_data, categorical_data, numerical_columns, categorical_columns = split_data(data, bundle.schema)
+    numerical_weights, categorical_weights = get_weightage(COMPANY, numerical_columns, categorical_columns)
+    livedata = data.drop(columns=data.columns[-_LIVE_DROPPED_COLUMNS:])
+    # Content does not matter for ranking cost, only the shape
+    shap_values = np.random.default_rng(SEED).normal(size=(len(data), len(bundle.feature_names)))
+
+    def predict_without_shap():
+        numerical, categorical, _, _ = split_data(data, bundle.schema)
+        features = _weighted_features(bundle, numerical, categorical, numerical_weights, categorical_weights)
+        return bundle.predict(features)
+
+    return [
+        ("align_columns_with_original_values", False,
+         lambda: align_columns_with_original_values(data, livedata.copy())),
+        ("split_data", False, lambda: split_data(data, bundle.schema)),
+        ("get_top_factors", False, lambda: get_top_factors(shap_values, bundle.feature_names)),
+        ("predict_with_weights_rf", True,
+         lambda: predict_with_weights_rf(model_path, numerical_data, categorical_data, numerical_weights,
+                                         categorical_weights, numerical_columns, categorical_columns)),
+        ("predict", True, lambda: predict(COMPANY, data, model_path=model_path)),
+        ("predict", False, predict_without_shap),
+        ("predict[explanation=path]", False, lambda: predict(COMPANY, data, model_path=model_path, explanation="path")),
+    ]
+
+
+def time_calls(call, min_calls, min_seconds, max_calls):
+    """
+    Call repeatedly, at least min_calls times and until min_seconds have passed.
+
+    Returns:
+        list: Wall time of every call in seconds.
+    """
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_calls and (len(timings) < min_calls or time.perf_counter() - start < min_seconds):
+        call_start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - call_start)
+    return timings
+
+
+def run_group(model_name, batch_size, min_calls, min_seconds, max_calls, shap_max_batch):
+    """
+    Benchmark every case of one model and batch size. Runs in its own process so the
+    reported peak RSS belongs to this group alone.
+    """
+    model_path = MODEL_PATHS[model_name]
+    rows = generate_shard(batch_size, SEED, 0, date(2025, 1, 1)).drop(columns=["Expected_Joining_Score"])
+    data = align_with_model_columns(rows, model_path=model_path)
+
+    results = []
+    for case, uses_shap, call in build_cases(model_path, data):
+        result = {"model": model_name, "case": case, "batch_size": batch_size, "shap": uses_shap}
+        if uses_shap and batch_size > shap_max_batch:
+            results.append(dict(result, skipped=f"SHAP cases are limited to {shap_max_batch} rows"))
+            continue
+
+        # Warm-up call, also loads the model bundle on first use
+        call()
+        timings = np.array(time_calls(call, min_calls, min_seconds, max_calls))
+        p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+        result.update({
+            "calls": len(timings),
+            "seconds": float(timings.sum()),
+            "rows_per_second": float(batch_size * len(timings) / timings.sum()),
+            "latency_ms": {"p50": float(p50), "p95": float(p95), "p99": float(p99)},
+        })
+        results.append(result)
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for result in results:
+        result["peak_rss_mb"] = peak_rss_mb
+    return results
+
+
+def run_benchmarks(models, batch_sizes, min_calls=3, min_seconds=1.0, max_calls=1000, shap_max_batch=10000):
+    """
+    Benchmark every model and batch size, each group in a fresh process.
+
+    Returns:
+        dict: Environment description and one result per (model, case, shap, batch size).
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for model_name in models:
+        if not os.path.exists(resolve_artifact_path(MODEL_PATHS[model_name])):
+            results.append({"model": model_name, "skipped": f"{MODEL_PATHS[model_name]} not found"})
+            continue
+        for batch_size in batch_sizes:
+            with context.Pool(1) as pool:
+                group = pool.apply(run_group, (model_name, batch_size, min_calls, min_seconds, max_calls,
+                                               shap_max_batch))
+            for result in group:
+                _log(result)
+            results.extend(group)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "shap": shap.__version__,
+        },
+        "results": results,
+    }
+
+
+def _memory_usage_mb():
+    # Pss splits shared pages between the processes mapping them: the real per-process cost
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if fields[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                usage[fields[0][:-1]] = int(fields[1]) / 1024
+    return {
+        "rss_mb": usage["Rss"],
+        "pss_mb": usage["Pss"],
+        "private_mb": usage["Private_Clean"] + usage["Private_Dirty"],
+    }
+
+
+def _load_worker(model_path, use_compiled, barrier, results):
+    before = _memory_usage_mb()
+    start = time.perf_counter()
+
+    model_dir = os.path.dirname(model_path)
+    bundle = ModelBundle(model_path, os.path.join(model_dir, SCALER_FILE_NAME),
+                         os.path.join(model_dir, ENCODER_FILE_NAME), use_compiled=use_compiled)
+    # Serve one row so every page a prediction needs is touched
+    bundle.predict(np.zeros((1, len(bundle.feature_names))))
+    load_seconds = time.perf_counter() - start
+
+    # Measure while every worker holds its model
+    barrier.wait()
+    after = _memory_usage_mb()
+    barrier.wait()
+    results.put({
+        "cold_load_seconds": load_seconds,
+        **after,
+        "model_pss_mb": after["pss_mb"] - before["pss_mb"],
+        "model_private_mb": after["private_mb"] - before["private_mb"],
+    })
+
+
+def measure_artifact_memory(models, workers=4):
+    """
+    Load each model in several concurrent worker processes, once by unpickling the
+    sklearn model and once by memory-mapping its compiled trees, and report the cold
+    load time and per-worker memory of both.
+
+    Returns:
+        list: One entry per (model, mode) with means over the workers.
+    """
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for model_name in models:
+        model_path = resolve_artifact_path(MODEL_PATHS[model_name])
+        if not os.path.exists(model_path):
+            report.append({"model": model_name, "skipped": f"{MODEL_PATHS[model_name]} not found"})
+            continue
+
+        for mode, use_compiled in (("pickle", False), ("mmap", True)):
+            if use_compiled and not os.path.isdir(compiled_trees_path(model_path)):
+                report.append({"model": model_name, "mode": mode,
+                               "skipped": "no compiled trees, run scripts/tree_engine.py first"})
+                continue
+
+            barrier = context.Barrier(workers)
+            results = context.Queue()
+            processes = [context.Process(target=_load_worker, args=(model_path, use_compiled, barrier, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            samples = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            entry = {"model": model_name, "mode": mode, "workers": workers}
+            for name in samples[0]:
+                entry[name] = float(np.mean([sample[name] for sample in samples]))
+            print(f"{model_name} {mode} x{workers} workers: cold load {entry['cold_load_seconds'] * 1000:.1f} ms, "
+                  f"model PSS {entry['model_pss_mb']:.2f} MB/worker, PSS {entry['pss_mb']:.0f} MB/worker",
+                  file=sys.stderr)
+            report.append(entry)
+    return report
+
+
+def compare_with_baseline(report, baseline, threshold=0.1):
+    """
+    Find cases that got slower than in the baseline report.
+
+    A case regresses when its rows/sec dropped, or its p95 latency grew, by more than
+    threshold (a fraction).
+
+    Returns:
+        list: One entry per regressed case with the baseline and current values.
+    """
+    def key(result):
+        return result["model"], result.get("case"), result.get("batch_size"), result.get("shap")
+
+    baseline_results = {key(result): result for result in baseline["results"] if "rows_per_second" in result}
+    regressions = []
+    for result in report["results"]:
+        before = baseline_results.get(key(result))
+        if before is None or "rows_per_second" not in result:
+            continue
+
+        throughput_change = result["rows_per_second"] / before["rows_per_second"] - 1
+        p95_change = result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1
+        if throughput_change < -threshold or p95_change > threshold:
+            regressions.append({
+                "model": result["model"],
+                "case": result["case"],
+                "batch_size": result["batch_size"],
+                "shap": result["shap"],
+                "baseline_rows_per_second": before["rows_per_second"],
+                "rows_per_second": result["rows_per_second"],
+                "baseline_p95_ms": before["latency_ms"]["p95"],
+                "p95_ms": result["latency_ms"]["p95"],
+            })
+    return regressions
+
+
+def _log(result):
+    name = f"{result['model']} {result.get('case')}{'' if result.get('shap') else ' (no SHAP)'} x{result.get('batch_size')}"
+    if "skipped" in result:
+        print(f"{name}: skipped, {result['skipped']}", file=sys.stderr)
+    else:
+        print(f"{name}: {result['rows_per_second']:.0f} rows/sec, p50 {result['latency_ms']['p50']:.2f} ms, "
+              f"p99 {result['latency_ms']['p99']:.2f} ms, peak RSS {result['peak_rss_mb']:.0f} MB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the inference functions on synthetic data.")
+    parser.add_argument("--models", default=",".join(MODEL_PATHS), help="Comma separated model types")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--min-calls", type=int, default=3, help="Timed calls per case, at least")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Keep calling a case until this much time passed")
+    parser.add_argument("--max-calls", type=int, default=1000)
+    parser.add_argument("--shap-max-batch", type=int, default=10000,
+                        help="Skip SHAP cases above this batch size, exact SHAP is slow on large batches")
+    parser.add_argument("--artifact-memory", action="store_true",
+                        help="Also report cold-load time and per-worker memory of pickled vs memory-mapped models")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent processes for --artifact-memory")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown before a case is flagged")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        args.models.split(","),
+        [int(size) for size in args.batch_sizes.split(",")],
+        min_calls=args.min_calls,
+        min_seconds=args.min_seconds,
+        max_calls=args.max_calls,
+        shap_max_batch=args.shap_max_batch,
+    )
+
+    if args.artifact_memory:
+        report["artifact_memory"] = measure_artifact_memory(args.models.split(","), workers=args.workers)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare_with_baseline(report, json.load(f), args.threshold)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['model']} {regression['case']} x{regression['batch_size']}: "
+                  f"{regression['baseline_rows_per_second']:.0f} -> {regression['rows_per_second']:.0f} rows/sec, "
+                  f"p95 {regression['baseline_p95_ms']:.2f} -> {regression['p95_ms']:.2f} ms",
+                  file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    sys.exit(1 if report.get("regressions") else 0)
@@ -0,0 +1,158 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from dataset_cache import cached_dataset
+from factor_weightage import get_weightage
+from model_bundle import DEFAULT_EXPLANATION, DEFAULT_MODEL_PATH, EXPLANATION_MODES, get_model_bundle
+from predict import align_with_model_columns, score_with_weights
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def read_chunks(input_path, chunk_size, use_cache=False):
+    """
+    Yield the input file as DataFrames of at most chunk_size rows.
+
+    Args:
+        input_path (str): CSV or Parquet file with one candidate per row.
+        chunk_size (int): Rows per chunk.
+        use_cache (bool): Read CSV input through its typed Parquet copy in the dataset cache.
+    """
+    if use_cache and not _is_parquet(input_path):
+        input_path, _ = cached_dataset(input_path)
+
+    if _is_parquet(input_path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+
+
+class ResultWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file as they are produced.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = _is_parquet(output_path)
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, result):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(result, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            result.to_csv(self.output_path, mode="a" if self._wrote_header else "w",
+                          header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_chunk(chunk, company, model_path=DEFAULT_MODEL_PATH, id_column=None, explanation=DEFAULT_EXPLANATION):
+    """
+    Align and score one chunk of candidates.
+
+    Returns:
+        pd.DataFrame: Expected joining score and summary per row, preceded by the id column if given.
+    """
+    bundle = get_model_bundle(model_path)
+    aligned = align_with_model_columns(chunk, model_path=model_path)
+    numerical_weights, categorical_weights = get_weightage(company, bundle.numerical_columns, bundle.categorical_columns)
+
+    result = score_with_weights(aligned, numerical_weights, categorical_weights, model_path=model_path,
+                                explanation=explanation)
+    if id_column is not None:
+        result.insert(0, id_column, chunk[id_column].values)
+    return result
+
+
+def bulk_score(input_path, output_path, company, model_path=DEFAULT_MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE,
+               workers=1, id_column=None, use_cache=False, explanation=DEFAULT_EXPLANATION):
+    """
+    Stream a candidate file through the batched predictor and append results to output_path.
+
+    Only a bounded number of chunks is held in memory at any time, so memory stays flat
+    regardless of input size. With workers > 1, chunks are scored in a process pool and
+    written in input order. High-volume runs can pass explanation="path" or "none" to
+    skip the cost of exact SHAP values.
+
+    Returns:
+        dict: Rows scored, elapsed seconds and end-to-end rows/sec.
+    """
+    writer = ResultWriter(output_path)
+    start = time.perf_counter()
+    rows = 0
+
+    def report(result):
+        nonlocal rows
+        writer.write(result)
+        rows += len(result)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {rows} rows ({rows / elapsed:.0f} rows/sec)", file=sys.stderr)
+
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size, use_cache):
+                report(score_chunk(chunk, company, model_path, id_column, explanation))
+        else:
+            # Keep a couple of chunks per worker in flight: enough to stay busy, bounded in memory
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for chunk in read_chunks(input_path, chunk_size, use_cache):
+                    pending.append(executor.submit(score_chunk, chunk, company, model_path, id_column, explanation))
+                    if len(pending) >= 2 * workers:
+                        report(pending.popleft().result())
+                while pending:
+                    report(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else None,
+    }
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large candidate file in bounded memory.")
+    parser.add_argument("input", help="CSV or Parquet file with one candidate per row")
+    parser.add_argument("output", help="CSV or Parquet file to write the scores to")
+    parser.add_argument("--company", default="Company_A", help="Company whose factor weightage is applied")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Score chunks in this many processes")
+    parser.add_argument("--id-column", help="Input column copied to the output to identify rows")
+    parser.add_argument("--cache", action="store_true", help="Convert CSV input once into the dataset cache and read that")
+    parser.add_argument("--explanation", choices=EXPLANATION_MODES, default=DEFAULT_EXPLANATION,
+                        help="How summaries are explained: exact SHAP, decision-path contributions or none")
+    args = parser.parse_args()
+
+    summary = bulk_score(args.input, args.output, args.company, model_path=args.model_path,
+                         chunk_size=args.chunk_size, workers=args.workers, id_column=args.id_column,
+                         use_cache=args.cache, explanation=args.explanation)
+    print(f"Scored {summary['rows']} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/sec)")
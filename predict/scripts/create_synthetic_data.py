@@ -1,6 +1,13 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 # Define synthetic data parameters
 locations = ['Madanapalle', 'Munger', 'Darbhanga', 'Chennai', 'Bangalore', 'Hyderabad', 'Mumbai', 'Delhi', 'Kolkata', 'Pune']
@@ -14,65 +21,180 @@ industries = ['Consulting', 'IT Services', 'Banking', 'Retail', 'Healthcare']
 job_roles = ['Developer', 'Team Lead', 'Data Analyst', 'Manager']
 offer_benefits = ['Health Insurance', 'Flexible Hours', 'Stock Options']
 work_modes = ['Offline', 'Hybrid', 'Remote']
-offer_deadlines = [datetime.today() + timedelta(days=i) for i in range(10, 60)]
-
-# Generate synthetic data
-np.random.seed(42)
-data = {
-    "Candidate_Location": np.random.choice(locations, 5000),
-    "Distance_From_Job_Location (km)": np.random.randint(5, 50, 5000),
-    "Cost_of_Living_Area": np.random.choice(['Low', 'Medium', 'High'], 5000),
-    "Current_Role": np.random.choice(roles, 5000),
-    "Seniority_Level": np.random.choice(seniority_levels, 5000),
-    "Experience_Years": np.random.randint(1, 15, 5000),
-    "Current_Salary (INR)": np.random.randint(300000, 2000000, 5000),
-    "Expected_Salary (INR)": np.random.randint(400000, 2500000, 5000),
-    "Education_Qualification": np.random.choice(education_levels, 5000),
-    "Relevant_Skills": np.random.choice(skills, 5000),
-    "Certifications": np.random.choice(certifications, 5000),
-    "Notice_Period (Days)": np.random.randint(0, 90, 5000),
-    "Planned_Leaves": np.random.randint(0, 15, 5000),
-    "Shift_Preference": np.random.choice(['Day', 'Night', 'Flexible'], 5000),
-    "Service_Bond_Acceptance": np.random.choice(['Yes', 'No'], 5000),
-    "Work_Mode_Preference": np.random.choice(work_modes, 5000),
-    "Current_Company_Name": np.random.choice(companies, 5000),
-    "Current_Company_Industry": np.random.choice(industries, 5000),
-    "Current_Company_Brand_Perception": np.random.choice(['Positive', 'Neutral', 'Negative'], 5000),
-    "Job_Hopping_History (Years)": np.random.randint(0, 10, 5000),
-    "Technology_Fit": np.random.choice(['Low', 'Moderate', 'High'], 5000),
-    "Offered_Salary (INR)": np.random.randint(400000, 3000000, 5000),
-    "Salary_Difference (INR)": np.random.randint(10000, 500000, 5000),
-    "Salary_Competitiveness": np.random.choice(['Below Average', 'Average', 'Above Average'], 5000),
-    "Offered_Position_Level": np.random.choice(seniority_levels, 5000),
-    "Offered_Job_Role": np.random.choice(job_roles, 5000),
-    "Job_Location": np.random.choice(locations, 5000),
-    "Relocation_Required": np.random.choice(['Yes', 'No'], 5000),
-    "Benefits_Package": np.random.choice(offer_benefits, 5000),
-    "Career_Growth_Opportunities": np.random.choice(['Limited', 'Moderate', 'Excellent'], 5000),
-    "Job_Security": np.random.choice(['Weak', 'Stable', 'Strong'], 5000),
-    "Offer_Company_Brand_Value": np.random.choice(['Low', 'Moderate', 'High'], 5000),
-    "Offer_Validity_Date": np.random.choice(offer_deadlines, 5000),
-    "Offer_Letter_Clarity": np.random.choice(['Clear', 'Ambiguous'], 5000),
-    "Expected_Joining_Score" :  np.random.randint(1, 1000, 5000)
-}
-
-df = pd.DataFrame(data)
-
-# Assign weights and calculate Expected Joining Score
-def calculate_joining_score(row):
-    score = row['Expected_Joining_Score']
-    score += 100 - row["Distance_From_Job_Location (km)"] * 2  # Closer is better
-    score += row["Offered_Salary (INR)"] / 30000  # Higher salary is better
-    score += 100 if row["Relocation_Required"] == "No" else -50
-    score += {"Limited": 30, "Moderate": 60, "Excellent": 100}[row["Career_Growth_Opportunities"]]
-    score += {"Weak": 20, "Stable": 60, "Strong": 100}[row["Job_Security"]]
-    score = np.clip(score, 1, 1000)
-    return score
-
-df["Expected_Joining_Score"] = df.apply(calculate_joining_score, axis=1)
-
-# Save to CSV
-csv_path = 'data/weighted_candidate_data_updated.csv'
-df.to_csv(csv_path, index=False)
-
-print('Synthetic data created...')
\ No newline at end of file
+offer_deadline_days = np.arange(10, 60)
+
+# Score adjustments used by the joining score formula
+career_growth_levels = ['Limited', 'Moderate', 'Excellent']
+career_growth_bonus = np.array([30, 60, 100])
+job_security_levels = ['Weak', 'Stable', 'Strong']
+job_security_bonus = np.array([20, 60, 100])
+
+DEFAULT_SHARD_SIZE = 500000
+
+
+def generate_shard(rows, seed, shard_index, today):
+    """
+    Generate one shard of synthetic candidates with their Expected Joining Score.
+
+    Every shard draws from its own generator seeded with (seed, shard_index), so shards
+    are reproducible and can be generated in any order or in parallel.
+
+    Args:
+        rows (int): Number of rows in the shard.
+        seed (int): Seed of the whole dataset.
+        shard_index (int): Position of the shard in the dataset.
+        today (date): Reference date for the offer validity dates.
+
+    Returns:
+        pd.DataFrame: The shard.
+    """
+    rng = np.random.default_rng([seed, shard_index])
+
+    def choice(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+    distance = rng.integers(5, 50, rows)
+    offered_salary = rng.integers(400000, 3000000, rows)
+    relocation_required = choice(['Yes', 'No'])
+    career_growth = rng.integers(0, len(career_growth_levels), rows)
+    job_security = rng.integers(0, len(job_security_levels), rows)
+    # Dates are stored as strings, the way the model encodes them
+    offer_validity = (np.datetime64(today, 'D') + choice(offer_deadline_days).astype('timedelta64[D]')).astype(str)
+
+    data = {
+        "Candidate_Location": choice(locations),
+        "Distance_From_Job_Location (km)": distance,
+        "Cost_of_Living_Area": choice(['Low', 'Medium', 'High']),
+        "Current_Role": choice(roles),
+        "Seniority_Level": choice(seniority_levels),
+        "Experience_Years": rng.integers(1, 15, rows),
+        "Current_Salary (INR)": rng.integers(300000, 2000000, rows),
+        "Expected_Salary (INR)": rng.integers(400000, 2500000, rows),
+        "Education_Qualification": choice(education_levels),
+        "Relevant_Skills": choice(skills),
+        "Certifications": choice(certifications),
+        "Notice_Period (Days)": rng.integers(0, 90, rows),
+        "Planned_Leaves": rng.integers(0, 15, rows),
+        "Shift_Preference": choice(['Day', 'Night', 'Flexible']),
+        "Service_Bond_Acceptance": choice(['Yes', 'No']),
+        "Work_Mode_Preference": choice(work_modes),
+        "Current_Company_Name": choice(companies),
+        "Current_Company_Industry": choice(industries),
+        "Current_Company_Brand_Perception": choice(['Positive', 'Neutral', 'Negative']),
+        "Job_Hopping_History (Years)": rng.integers(0, 10, rows),
+        "Technology_Fit": choice(['Low', 'Moderate', 'High']),
+        "Offered_Salary (INR)": offered_salary,
+        "Salary_Difference (INR)": rng.integers(10000, 500000, rows),
+        "Salary_Competitiveness": choice(['Below Average', 'Average', 'Above Average']),
+        "Offered_Position_Level": choice(seniority_levels),
+        "Offered_Job_Role": choice(job_roles),
+        "Job_Location": choice(locations),
+        "Relocation_Required": relocation_required,
+        "Benefits_Package": choice(offer_benefits),
+        "Career_Growth_Opportunities": np.asarray(career_growth_levels, dtype=object)[career_growth],
+        "Job_Security": np.asarray(job_security_levels, dtype=object)[job_security],
+        "Offer_Company_Brand_Value": choice(['Low', 'Moderate', 'High']),
+        "Offer_Validity_Date": offer_validity,
+        "Offer_Letter_Clarity": choice(['Clear', 'Ambiguous']),
+    }
+
+    # Assign weights and calculate Expected Joining Score
+    score = rng.integers(1, 1000, rows).astype(float)
+    score += 100 - distance * 2  # Closer is better
+    score += offered_salary / 30000  # Higher salary is better
+    score += np.where(relocation_required == "No", 100, -50)
+    score += career_growth_bonus[career_growth]
+    score += job_security_bonus[job_security]
+    data["Expected_Joining_Score"] = np.clip(score, 1, 1000)
+
+    return pd.DataFrame(data)
+
+
+def write_shard(path, rows, seed, shard_index, today):
+    """
+    Generate a shard and write it to its own CSV or Parquet file.
+    """
+    shard = generate_shard(rows, seed, shard_index, today)
+    if _is_parquet(path):
+        shard.to_parquet(path, index=False)
+    else:
+        shard.to_csv(path, index=False)
+    return len(shard)
+
+
+def create_synthetic_data(output_path, rows=5000, shard_size=DEFAULT_SHARD_SIZE, workers=1, seed=42):
+    """
+    Generate a synthetic candidate dataset of any size in bounded memory.
+
+    The dataset is produced in shards of at most shard_size rows, each written to a
+    temporary part file (in parallel processes when workers > 1) and then streamed
+    into output_path in shard order. The same seed always gives the same rows.
+
+    Args:
+        output_path (str): CSV or Parquet file to create.
+        rows (int): Total number of rows.
+        shard_size (int): Rows generated and held in memory at once per worker.
+        workers (int): Processes generating shards.
+        seed (int): Seed of the dataset.
+    """
+    today = datetime.today().date()
+    shard_rows = [min(shard_size, rows - start) for start in range(0, rows, shard_size)]
+    extension = os.path.splitext(output_path)[1]
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, f"part-{index:05d}{extension}") for index in range(len(shard_rows))]
+        jobs = [(path, count, seed, index, today) for index, (path, count) in enumerate(zip(part_paths, shard_rows))]
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(write_shard, *zip(*jobs)))
+        else:
+            for job in jobs:
+                write_shard(*job)
+
+        _concatenate_parts(part_paths, output_path)
+
+
+def _concatenate_parts(part_paths, output_path):
+    if _is_parquet(output_path):
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for path in part_paths:
+                part = pq.ParquetFile(path)
+                for batch in part.iter_batches():
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, part.schema_arrow)
+                    writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(output_path, "wb") as output:
+        for index, path in enumerate(part_paths):
+            with open(path, "rb") as part:
+                # Every part has its own header line; keep the first one only
+                if index > 0:
+                    part.readline()
+                shutil.copyfileobj(part, output)
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic candidate data.")
+    parser.add_argument("--output", default="data/weighted_candidate_data_updated.csv", help="CSV or Parquet file")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    create_synthetic_data(args.output, rows=args.rows, shard_size=args.shard_size, workers=args.workers, seed=args.seed)
+    print(f'Synthetic data created: {args.rows} rows in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+
+from model_bundle import resolve_artifact_path
+
+TARGET_COLUMN = "Expected_Joining_Score"
+CACHE_DIR = "data/.cache"
+
+CATEGORICAL = "categorical"
+NUMERICAL = "numerical"
+DATE = "date"
+
+_SCHEMA_SAMPLE_ROWS = 10000
+# Part of every cache key; bump it when the way schemas are inferred changes, so copies
+# converted with the old rules are not reused
+SCHEMA_INFERENCE_VERSION = 2
+_CONVERT_CHUNK_ROWS = 500000
+_DATE_COLUMN_NAME = re.compile(r"date|deadline", re.IGNORECASE)
+
+
+class DatasetSchema:
+    """
+    Explicit column kinds of a dataset, in file order.
+
+    Date columns are kept as their original strings: the model encodes them as
+    categories, so they are part of categorical_columns.
+    """
+
+    def __init__(self, columns, target_column=None):
+        self.columns = dict(columns)
+        self.target_column = target_column
+
+    @property
+    def feature_columns(self):
+        return [col for col in self.columns if col != self.target_column]
+
+    @property
+    def categorical_columns(self):
+        return [col for col in self.feature_columns if self.columns[col] in (CATEGORICAL, DATE)]
+
+    @property
+    def numerical_columns(self):
+        return [col for col in self.feature_columns if self.columns[col] == NUMERICAL]
+
+    @property
+    def date_columns(self):
+        return [col for col in self.feature_columns if self.columns[col] == DATE]
+
+    def to_dict(self):
+        return {"columns": self.columns, "target_column": self.target_column}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["columns"], data.get("target_column"))
+
+
+def infer_schema(sample, target_column=TARGET_COLUMN):
+    """
+    Decide the kind of every column from a sample of the dataset.
+    """
+    columns = {}
+    for col in sample.columns:
+        if _is_numerical(sample[col]):
+            columns[col] = NUMERICAL
+        elif _DATE_COLUMN_NAME.search(col) and _mostly_dates(sample[col]):
+            columns[col] = DATE
+        else:
+            columns[col] = CATEGORICAL
+
+    return DatasetSchema(columns, target_column if target_column in columns else None)
+
+
+def scan_schema(source_path, target_column=TARGET_COLUMN):
+    """
+    Decide the kind of every column of a CSV from all of its rows, read in chunks.
+
+    Date columns are recognized from the first rows, but a column is only numerical if
+    every chunk parses as numbers: a single text value anywhere makes it categorical, so
+    the typed conversion never meets a value it cannot parse.
+    """
+    schema = None
+    for chunk in pd.read_csv(source_path, chunksize=_CONVERT_CHUNK_ROWS):
+        if schema is None:
+            schema = infer_schema(chunk.head(_SCHEMA_SAMPLE_ROWS), target_column)
+        for col, kind in schema.columns.items():
+            if kind == NUMERICAL and not _is_numerical(chunk[col]):
+                schema.columns[col] = CATEGORICAL
+    if schema is None:
+        # Header without rows
+        schema = infer_schema(pd.read_csv(source_path, nrows=0), target_column)
+    return schema
+
+
+def file_digest(path, cache_dir=CACHE_DIR):
+    """
+    SHA-256 of a file. Digests are remembered per (size, mtime) so unchanged files are
+    only hashed once.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cache_dir = resolve_artifact_path(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "sources.json")
+
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    entry = index.get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    _write_atomically(index_path, lambda tmp: _dump_json(index, tmp))
+    return digest.hexdigest()
+
+
+def cached_dataset(source_path, target_column=TARGET_COLUMN, cache_dir=CACHE_DIR):
+    """
+    Make sure a typed Parquet copy of a source CSV exists and return where it is.
+
+    The copy is keyed by the source file's hash and the schema inference version, so
+    editing the CSV or changing how column kinds are inferred produces a new copy.
+    The schema is settled by a first pass over the whole file, then conversion streams
+    the CSV in chunks with it, so memory stays bounded for multi-million-row files.
+
+    Returns:
+        str: Path of the Parquet file.
+        DatasetSchema: Column kinds of the dataset.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cache_dir = resolve_artifact_path(cache_dir)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    digest = file_digest(source_path, cache_dir)[:16]
+    base = os.path.join(cache_dir, f"{stem}-{digest}-v{SCHEMA_INFERENCE_VERSION}")
+    parquet_path, schema_path = base + ".parquet", base + ".schema.json"
+
+    if os.path.exists(parquet_path) and os.path.exists(schema_path):
+        with open(schema_path) as f:
+            return parquet_path, DatasetSchema.from_dict(json.load(f))
+
+    schema = scan_schema(source_path, target_column)
+    dtypes = {col: "float64" if kind == NUMERICAL else "str" for col, kind in schema.columns.items()}
+    arrow_schema = pa.schema([
+        (col, pa.float64() if kind == NUMERICAL else pa.string()) for col, kind in schema.columns.items()
+    ])
+
+    def convert(tmp_path):
+        with pq.ParquetWriter(tmp_path, arrow_schema) as writer:
+            for chunk in pd.read_csv(source_path, dtype=dtypes, chunksize=_CONVERT_CHUNK_ROWS):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False))
+
+    _write_atomically(parquet_path, convert)
+    _write_atomically(schema_path, lambda tmp: _dump_json(schema.to_dict(), tmp))
+    return parquet_path, schema
+
+
+def load_dataset(source_path, target_column=TARGET_COLUMN, cache_dir=CACHE_DIR):
+    """
+    Load a CSV dataset through the columnar cache.
+
+    Categorical and date columns come back as pandas categoricals and numerical columns
+    as float64, so no type inference happens after the first conversion.
+
+    Returns:
+        pd.DataFrame: The dataset.
+        DatasetSchema: Column kinds of the dataset.
+    """
+    import pyarrow.parquet as pq
+
+    parquet_path, schema = cached_dataset(source_path, target_column, cache_dir)
+    table = pq.read_table(parquet_path, read_dictionary=schema.categorical_columns)
+    return table.to_pandas(), schema
+
+
+def _is_numerical(values):
+    # Booleans read as True/False would not parse as float64
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+
+def _mostly_dates(values):
+    values = values.dropna()
+    if values.empty:
+        return False
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    return parsed.notna().mean() > 0.95
+
+
+def _dump_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _write_atomically(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
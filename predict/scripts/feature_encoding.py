@@ -0,0 +1,112 @@
+import math
+import numbers
+
+import numpy as np
+import pandas as pd
+
+# Up to this many rows per column, plain dict lookups beat the fixed cost of a pandas
+# hash table lookup; larger batches go through pd.Index.get_indexer
+_DICT_LOOKUP_MAX_ROWS = 512
+
+
+class FeatureEncoder:
+    """
+    A fitted OrdinalEncoder and StandardScaler compiled into plain lookup tables, so
+    building the model's feature matrix needs no DataFrames and no sklearn validation.
+
+    Every categorical column gets a value -> code dict and a pandas Index over the same
+    categories; values outside the vocabulary get the encoder's unknown_value (-1).
+    Missing values (NaN) are handled apart from the lookups, the same way sklearn does:
+    they get the encoder's encoded_missing_value in columns that had missing values in
+    training, and count as unknown in the others. Outputs are identical to
+    encoder.transform and scaler.transform, whatever the batch size.
+    """
+
+    def __init__(self, encoder, scaler):
+        self.categorical_columns = list(encoder.feature_names_in_)
+        self.numerical_columns = list(scaler.feature_names_in_)
+
+        # NaN is never a lookup key: NaN != NaN, and pandas would match None to it
+        self._codes = [
+            {value: code for code, value in enumerate(categories) if not _is_nan(value)}
+            for categories in encoder.categories_
+        ]
+        self._indexes = [pd.Index([value for value in categories if not _is_nan(value)], dtype=object)
+                         for categories in encoder.categories_]
+        # Columns fitted with missing values, whose NaNs get encoded_missing_value
+        self._has_missing = [any(_is_nan(value) for value in categories) for categories in encoder.categories_]
+        self.encoded_missing_value = getattr(encoder, "encoded_missing_value", np.nan)
+        if encoder.handle_unknown == "use_encoded_value":
+            self.unknown_value = encoder.unknown_value
+        else:
+            self.unknown_value = None
+
+        n_numerical = len(self.numerical_columns)
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(n_numerical)
+        self.scale = scaler.scale_ if scaler.with_std else np.ones(n_numerical)
+
+    @property
+    def n_features(self):
+        return len(self.categorical_columns) + len(self.numerical_columns)
+
+    def encode_into(self, categorical_data, out):
+        """
+        Write the ordinal codes of a 2D array of categorical values into out, column by column.
+        """
+        small = len(categorical_data) <= _DICT_LOOKUP_MAX_ROWS
+        for j, (codes, index) in enumerate(zip(self._codes, self._indexes)):
+            values = categorical_data[:, j]
+            if small:
+                column = np.array([codes.get(value, -1) for value in values], dtype=np.float64)
+            else:
+                column = index.get_indexer(values).astype(np.float64)
+
+            missing = _nan_mask(values) if self._has_missing[j] else None
+            unknown = column == -1
+            if missing is not None:
+                unknown &= ~missing
+            if unknown.any():
+                if self.unknown_value is None:
+                    row = np.flatnonzero(unknown)[0]
+                    raise ValueError(f"Found unknown categories {values[row]!r} "
+                                     f"in column {self.categorical_columns[j]!r} during transform")
+                column[unknown] = self.unknown_value
+            if missing is not None:
+                column[missing] = self.encoded_missing_value
+            out[:, j] = column
+        return out
+
+    def weighted_features(self, numerical_data, categorical_data, numerical_weights, categorical_weights):
+        """
+        Encode, scale and weight a block of rows straight into one preallocated feature
+        matrix laid out like the training data: categorical codes first, then numerical.
+
+        Weights may be a single vector applied to every row or a matrix with one weight
+        vector per row.
+        """
+        n_categorical = len(self.categorical_columns)
+        features = np.empty((len(numerical_data), self.n_features))
+        categorical = features[:, :n_categorical]
+        numerical = features[:, n_categorical:]
+
+        self.encode_into(np.asarray(categorical_data, dtype=object), categorical)
+        categorical *= categorical_weights
+
+        # Same operations, in the same order, as StandardScaler.transform
+        np.subtract(np.asarray(numerical_data, dtype=np.float64), self.mean, out=numerical)
+        numerical /= self.scale
+        numerical *= numerical_weights
+        return features
+
+
+def _is_nan(value):
+    # Same test as sklearn's is_scalar_nan: None and other null markers are plain categories
+    return isinstance(value, numbers.Real) and math.isnan(value)
+
+
+def _nan_mask(values):
+    # pd.isna is vectorized but also flags None; only its hits are checked one by one
+    mask = pd.isna(values)
+    if mask.any():
+        mask[mask] = [_is_nan(value) for value in values[mask]]
+    return mask
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FEATURE_SCHEMA_FILE_NAME = "feature_schema.json"
+
+# Categorical value for features without a default; the encoder maps it to -1
+UNKNOWN_CATEGORY = "Unknown"
+
+
+class FeatureSchema:
+    """
+    Column layout of the model input with everything needed to align live rows to it:
+    column order, dtypes, per-column defaults and the categorical vocabularies.
+
+    Built once from the training data and stored next to the model artifacts, so
+    aligning a batch never needs sample rows or column-by-column mutation.
+    """
+
+    def __init__(self, categorical_columns, numerical_columns, defaults, vocabularies):
+        self.categorical_columns = list(categorical_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.defaults = dict(defaults)
+        self.vocabularies = {col: list(values) for col, values in vocabularies.items()}
+
+        # Defaults as ready-made rows, broadcast over missing values in one step
+        self._numerical_defaults = pd.Series(
+            [float(self.defaults[col]) for col in self.numerical_columns], index=self.numerical_columns
+        )
+        self._categorical_defaults = np.array(
+            [str(self.defaults[col]) for col in self.categorical_columns], dtype=object
+        )
+
+    @property
+    def columns(self):
+        # Feature matrix layout used in training: categorical first, then numerical
+        return self.categorical_columns + self.numerical_columns
+
+    @property
+    def dtypes(self):
+        dtypes = {col: "object" for col in self.categorical_columns}
+        dtypes.update({col: "float64" for col in self.numerical_columns})
+        return dtypes
+
+    def align(self, livedata):
+        """
+        Align a batch of any size with the model columns.
+
+        Missing columns take the column default. Numerical values are cast to float64 and
+        missing or unparsable ones take the default too. Categorical values are cast to
+        strings, but a missing one stays NaN: training kept NaN as a category of its own,
+        so it must not be replaced by the most frequent value. Columns are put in
+        training order.
+
+        Args:
+            livedata (pd.DataFrame): Candidate rows, possibly missing some feature columns.
+
+        Returns:
+            pd.DataFrame: Rows ready for split_data and scoring.
+        """
+        numerical = livedata.reindex(columns=self.numerical_columns)
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in numerical.dtypes):
+            numerical = numerical.apply(pd.to_numeric, errors="coerce")
+        numerical = numerical.astype("float64").fillna(self._numerical_defaults)
+
+        categorical = livedata.reindex(columns=self.categorical_columns).to_numpy(dtype=object)
+        absent = [j for j, col in enumerate(self.categorical_columns) if col not in livedata.columns]
+        if absent:
+            categorical[:, absent] = self._categorical_defaults[absent]
+        present = pd.notna(categorical)
+        categorical[present] = categorical[present].astype(str)
+        # None and the other null markers become the NaN the encoder was fitted with
+        categorical[~present] = np.nan
+        categorical = pd.DataFrame(categorical, columns=self.categorical_columns, index=livedata.index)
+
+        return pd.concat([categorical, numerical], axis=1)
+
+    def to_dict(self):
+        return {
+            "categorical_columns": self.categorical_columns,
+            "numerical_columns": self.numerical_columns,
+            "dtypes": self.dtypes,
+            "defaults": self.defaults,
+            "vocabularies": self.vocabularies,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["categorical_columns"], data["numerical_columns"], data["defaults"], data["vocabularies"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_training_data(cls, data, encoder, scaler):
+        """
+        Build the schema from the training rows and the encoder and scaler fitted on them.
+        Numerical defaults are the training means, categorical defaults the most frequent
+        value. Missing values are neither a default nor part of a vocabulary.
+        """
+        categorical_columns = list(encoder.feature_names_in_)
+        numerical_columns = list(scaler.feature_names_in_)
+
+        defaults = {col: float(mean) for col, mean in zip(numerical_columns, scaler.mean_)}
+        for col in categorical_columns:
+            counts = data[col].dropna().astype(str).value_counts(sort=False)
+            # Ties go to the first value in vocabulary order
+            defaults[col] = str(counts.sort_index(kind="stable").idxmax()) if len(counts) else UNKNOWN_CATEGORY
+
+        vocabularies = _vocabularies(categorical_columns, encoder)
+        return cls(categorical_columns, numerical_columns, defaults, vocabularies)
+
+    @classmethod
+    def from_preprocessors(cls, encoder, scaler):
+        """
+        Schema for artifacts trained before schemas were saved: numerical defaults are the
+        training means and categorical gaps become the unknown category.
+        """
+        categorical_columns = list(encoder.feature_names_in_)
+        numerical_columns = list(scaler.feature_names_in_)
+        defaults = {col: float(mean) for col, mean in zip(numerical_columns, scaler.mean_)}
+        defaults.update({col: UNKNOWN_CATEGORY for col in categorical_columns})
+        vocabularies = _vocabularies(categorical_columns, encoder)
+        return cls(categorical_columns, numerical_columns, defaults, vocabularies)
+
+
+def _vocabularies(categorical_columns, encoder):
+    return {col: [str(value) for value in categories if not pd.isna(value)]
+            for col, categories in zip(categorical_columns, encoder.categories_)}
+
+
+def load_feature_schema(model_dir, encoder, scaler):
+    """
+    Load the schema saved in a model directory, or derive one from the encoder and
+    scaler when the directory has none.
+    """
+    path = os.path.join(model_dir, FEATURE_SCHEMA_FILE_NAME)
+    if os.path.exists(path):
+        return FeatureSchema.load(path)
+    return FeatureSchema.from_preprocessors(encoder, scaler)
+
+
+if __name__ == "__main__":
+    from joblib import load
+
+    from dataset_cache import load_dataset
+
+    parser = argparse.ArgumentParser(description="Build the feature schema of existing model artifacts.")
+    parser.add_argument("--data-path", default="data/weighted_candidate_data_updated.csv",
+                        help="Dataset the encoder and scaler were fitted on")
+    parser.add_argument("--model-dir", default="models")
+    args = parser.parse_args()
+
+    data, _ = load_dataset(args.data_path)
+    schema = FeatureSchema.from_training_data(
+        data,
+        load(os.path.join(args.model_dir, "encoder.joblib")),
+        load(os.path.join(args.model_dir, "scaler.joblib")),
+    )
+    schema.save(os.path.join(args.model_dir, FEATURE_SCHEMA_FILE_NAME))
+    print(f"Feature schema saved to {os.path.join(args.model_dir, FEATURE_SCHEMA_FILE_NAME)}")
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+import shap
+from joblib import load
+
+from feature_encoding import FeatureEncoder
+from feature_schema import FEATURE_SCHEMA_FILE_NAME, load_feature_schema
+from tree_engine import compile_trees, compiled_trees_path, file_sha256, load_tree_ensemble
+
+# Artifact paths are resolved against the predict/ directory so the bundle can be
+# loaded both from the CLI (cwd = predict/) and from the API (cwd = repo root).
+PREDICT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODEL_PATH = "models/random_forest_model.joblib"
+SCALER_FILE_NAME = "scaler.joblib"
+ENCODER_FILE_NAME = "encoder.joblib"
+
+# Up to this many rows the compiled trees beat sklearn's per-call overhead; larger
+# batches go through the sklearn model
+ENGINE_MAX_ROWS = 256
+
+# How predictions are explained: exact SHAP values, decision-path contributions
+# collected while traversing the trees, or no explanation at all
+EXPLANATION_MODES = ("shap", "path", "none")
+DEFAULT_EXPLANATION = "shap"
+
+
+def resolve_artifact_path(path):
+    """
+    Resolve an artifact path relative to the predict/ directory.
+    """
+    if os.path.isabs(path):
+        return path
+    return os.path.join(PREDICT_DIR, path)
+
+
+class ModelBundle:
+    """
+    Everything needed to score a batch: the fitted model, scaler and encoder, the
+    feature column order they were trained with and the explainers for the model.
+
+    When the model has been compiled with tree_engine and the compiled tables match
+    the model file, the tables are memory-mapped read-only and predictions use them, so
+    every process on a host shares one physical copy of the trees. The sklearn model is
+    then only unpickled once something needs it, e.g. the SHAP explainer; from that
+    point large batches go back to sklearn, which is faster on them.
+    """
+
+    def __init__(self, model_path, scaler_path, encoder_path, use_compiled=True):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.encoder_path = encoder_path
+        self.schema_path = os.path.join(os.path.dirname(model_path), FEATURE_SCHEMA_FILE_NAME)
+        self.signature = _artifact_signature(self.artifact_paths)
+
+        self.scaler = load(scaler_path)
+        self.encoder = load(encoder_path)
+
+        # Column order the scaler and encoder were fitted with
+        self.numerical_columns = list(self.scaler.feature_names_in_)
+        self.categorical_columns = list(self.encoder.feature_names_in_)
+
+        # Feature matrix layout used in training: categorical first, then numerical
+        self.feature_names = self.categorical_columns + self.numerical_columns
+
+        # Encoder and scaler compiled into lookup tables for the scoring hot path
+        self.feature_encoder = FeatureEncoder(self.encoder, self.scaler)
+
+        # Column order, defaults and vocabularies used to align live rows
+        self.schema = load_feature_schema(os.path.dirname(self.schema_path), self.encoder, self.scaler)
+
+        self.version = _artifact_version(self.artifact_paths)
+        self.engine = _load_engine(model_path) if use_compiled else None
+
+        self._lock = threading.Lock()
+        self._model = None if self.engine is not None else load(model_path)
+        self._explainer = None
+        self._path_explainer = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = load(self.model_path)
+        return self._model
+
+    @property
+    def explainer(self):
+        """
+        SHAP explainer of the sklearn model. Building it loads the model, so a process that
+        explains with SHAP holds its own copy of the trees next to the shared compiled ones.
+        """
+        if self._explainer is None:
+            model = self.model
+            with self._lock:
+                if self._explainer is None:
+                    self._explainer = shap.TreeExplainer(model)
+        return self._explainer
+
+    @property
+    def path_explainer(self):
+        """
+        Compiled trees used for decision-path contributions: the memory-mapped tables when
+        available, otherwise compiled once from the sklearn model.
+        """
+        if self.engine is not None:
+            return self.engine
+        if self._path_explainer is None:
+            model = self.model
+            with self._lock:
+                if self._path_explainer is None:
+                    self._path_explainer = compile_trees(model)
+        return self._path_explainer
+
+    def explain(self, features, explanation=DEFAULT_EXPLANATION):
+        """
+        Per-feature contributions of a weighted feature matrix in the given explanation
+        mode, one row per input row; None for mode "none".
+        """
+        if explanation == "shap":
+            return self.explainer.shap_values(features)
+        if explanation == "path":
+            return self.path_explainer.contributions(features)
+        if explanation == "none":
+            return None
+        raise ValueError(f"Unknown explanation mode {explanation!r}, expected one of {', '.join(EXPLANATION_MODES)}")
+
+    def predict(self, features):
+        """
+        Predict a weighted feature matrix, with the compiled trees when the sklearn model
+        is not loaded or the batch is small.
+        """
+        if self.engine is not None and (self._model is None or len(features) <= ENGINE_MAX_ROWS):
+            if len(features) == 1:
+                return self.engine.predict_row(features[0])[None]
+            return self.engine.predict(features)
+        return self.model.predict(features)
+
+    def warm_up(self, explanation=DEFAULT_EXPLANATION):
+        """
+        Score and explain one row of column defaults, so everything a request touches
+        (lazy model, explainer, lookup tables) is loaded before the bundle serves traffic.
+        """
+        row = self.schema.align(pd.DataFrame(index=[0]))
+        features = self.feature_encoder.weighted_features(
+            row[self.numerical_columns].to_numpy(), row[self.categorical_columns].to_numpy(), 1.0, 1.0
+        )
+        self.predict(features)
+        self.explain(features, explanation)
+
+    @property
+    def artifact_paths(self):
+        # The feature schema shapes every aligned row, so it is part of the version too;
+        # model directories trained before it existed have none
+        paths = (self.model_path, self.scaler_path, self.encoder_path)
+        return paths + (self.schema_path,) if os.path.exists(self.schema_path) else paths
+
+    def is_stale(self):
+        """
+        Check whether any artifact file changed on disk since the bundle was loaded.
+        """
+        try:
+            return _artifact_signature(self.artifact_paths) != self.signature
+        except FileNotFoundError:
+            # Artifacts are being rewritten, keep serving the loaded ones
+            return False
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def get_model_bundle(model_path=DEFAULT_MODEL_PATH):
+    """
+    Return the process-wide bundle for the given model, loading it on first use and
+    reloading it whenever one of the artifact files changes.
+
+    Args:
+        model_path (str): Path to the saved model, absolute or relative to predict/.
+            The scaler and encoder are read from the same directory.
+
+    Returns:
+        ModelBundle: The loaded bundle shared by every caller.
+    """
+    model_path = resolve_artifact_path(model_path)
+
+    bundle = _bundles.get(model_path)
+    if bundle is not None and not bundle.is_stale():
+        return bundle
+
+    with _bundles_lock:
+        # Another thread may have loaded it while we were waiting for the lock
+        bundle = _bundles.get(model_path)
+        if bundle is None or bundle.is_stale():
+            model_dir = os.path.dirname(model_path)
+            bundle = ModelBundle(
+                model_path,
+                os.path.join(model_dir, SCALER_FILE_NAME),
+                os.path.join(model_dir, ENCODER_FILE_NAME),
+            )
+            _bundles[model_path] = bundle
+
+    return bundle
+
+
+def clear_model_bundles():
+    """
+    Drop every cached bundle, forcing the next caller to reload from disk.
+    """
+    with _bundles_lock:
+        _bundles.clear()
+
+
+def evict_model_bundles(keep_paths):
+    """
+    Drop every cached bundle except the given models'. Callers still holding an evicted
+    bundle keep using it; it is freed once the last of them is done.
+    """
+    keep = {resolve_artifact_path(path) for path in keep_paths}
+    with _bundles_lock:
+        for path in list(_bundles):
+            if path not in keep:
+                del _bundles[path]
+
+
+def _load_engine(model_path):
+    # Compiled tables left over from an earlier model file are ignored
+    directory = compiled_trees_path(model_path)
+    if not os.path.isdir(directory):
+        return None
+    engine, meta = load_tree_ensemble(directory)
+    if meta.get("model_sha256") != file_sha256(model_path):
+        return None
+    return engine
+
+
+def _artifact_signature(paths):
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _artifact_version(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as artifact:
+            for block in iter(lambda: artifact.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
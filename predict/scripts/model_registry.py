@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import uuid
+from datetime import datetime
+
+from model_bundle import resolve_artifact_path
+
+REGISTRY_DIR = "models/registry"
+CURRENT_FILE_NAME = "CURRENT"
+METADATA_FILE_NAME = "metadata.json"
+
+# Files hashed into the version id; metadata and compiled trees are derived from them
+_DERIVED_SUFFIXES = (METADATA_FILE_NAME, ".trees")
+
+
+class ModelVersionNotFoundError(LookupError):
+    def __init__(self, model_name, version):
+        super().__init__(f"Model version not found: {model_name}/{version}")
+        self.model_name = model_name
+        self.version = version
+
+
+class ModelRegistry:
+    """
+    Immutable, content-addressed model versions on disk.
+
+    Every training run is published as registry/<model name>/<version>/, holding the
+    model with its compiled trees, the encoder, scaler and feature schema it was trained
+    with, and a metadata file. The version id is a hash of the artifact contents, so a
+    version directory always holds one consistent set of artifacts and is never written
+    again once published. registry/<model name>/CURRENT names the version to serve and is
+    replaced atomically.
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR):
+        self.registry_dir = resolve_artifact_path(registry_dir)
+
+    def model_dir(self, model_name):
+        return os.path.join(self.registry_dir, model_name)
+
+    def version_dir(self, model_name, version):
+        return os.path.join(self.model_dir(model_name), version)
+
+    def new_staging_dir(self, model_name):
+        """
+        Empty directory on the registry's filesystem to write a version's artifacts into
+        before publishing it.
+        """
+        path = os.path.join(self.model_dir(model_name), f".staging-{uuid.uuid4().hex}")
+        os.makedirs(path)
+        return path
+
+    def publish(self, model_name, staging_dir, model_file, metadata):
+        """
+        Turn a staging directory into an immutable version.
+
+        The artifacts are hashed, the metadata is written, every file is made read-only
+        and the directory is renamed into place in one step, so readers never see a
+        partially written version. Publishing the same artifacts twice returns the
+        existing version.
+
+        Args:
+            model_name (str): Model the version belongs to, e.g. "random_forest".
+            staging_dir (str): Directory from new_staging_dir holding the artifacts.
+            model_file (str): File name of the model inside the directory.
+            metadata (dict): Metrics, training data hash and anything else worth keeping.
+
+        Returns:
+            str: The version id.
+        """
+        version = _content_hash(staging_dir)
+        metadata = dict(metadata, version=version, model_name=model_name, model_file=model_file,
+                        created_at=metadata.get("created_at", datetime.utcnow().isoformat()))
+        with open(os.path.join(staging_dir, METADATA_FILE_NAME), "w") as f:
+            json.dump(metadata, f, indent=2)
+        _make_read_only(staging_dir)
+
+        target = self.version_dir(model_name, version)
+        try:
+            os.rename(staging_dir, target)
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            # Identical artifacts were published before
+            _remove_tree(staging_dir)
+        return version
+
+    def versions(self, model_name):
+        """
+        Metadata of every published version of a model, oldest first.
+        """
+        model_dir = self.model_dir(model_name)
+        if not os.path.isdir(model_dir):
+            return []
+        versions = []
+        for name in os.listdir(model_dir):
+            path = os.path.join(model_dir, name, METADATA_FILE_NAME)
+            if not name.startswith(".") and os.path.exists(path):
+                with open(path) as f:
+                    versions.append(json.load(f))
+        return sorted(versions, key=lambda metadata: metadata["created_at"])
+
+    def metadata(self, model_name, version):
+        path = os.path.join(self.version_dir(model_name, version), METADATA_FILE_NAME)
+        if not os.path.exists(path):
+            raise ModelVersionNotFoundError(model_name, version)
+        with open(path) as f:
+            return json.load(f)
+
+    def model_path(self, model_name, version):
+        """
+        Path of a version's model file, loadable with get_model_bundle.
+        """
+        return os.path.join(self.version_dir(model_name, version), self.metadata(model_name, version)["model_file"])
+
+    def current_version(self, model_name):
+        """
+        Version named by the model's CURRENT pointer, or None before any was activated.
+        """
+        try:
+            with open(os.path.join(self.model_dir(model_name), CURRENT_FILE_NAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, model_name, version):
+        """
+        Point CURRENT at a published version; the pointer file is replaced atomically.
+        """
+        self.metadata(model_name, version)
+        path = os.path.join(self.model_dir(model_name), CURRENT_FILE_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, path)
+
+
+def _content_hash(directory):
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(_DERIVED_SUFFIXES):
+            continue
+        digest.update(name.encode() + b"\0")
+        with open(os.path.join(directory, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _make_read_only(directory):
+    read_only = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+    for root, _, files in os.walk(directory):
+        for name in files:
+            os.chmod(os.path.join(root, name), read_only)
+
+
+def _remove_tree(directory):
+    def make_writable(function, path, _):
+        os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+        function(path)
+
+    shutil.rmtree(directory, onerror=make_writable)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or activate model versions.")
+    parser.add_argument("model_name", help="e.g. random_forest")
+    parser.add_argument("--activate", metavar="VERSION", help="Point CURRENT at this version")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry_dir)
+    if args.activate:
+        registry.set_current(args.model_name, args.activate)
+
+    current = registry.current_version(args.model_name)
+    for metadata in registry.versions(args.model_name):
+        marker = "*" if metadata["version"] == current else " "
+        print(f"{marker} {metadata['version']}  {metadata['created_at']}  {json.dumps(metadata.get('metrics', {}))}")
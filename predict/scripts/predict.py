@@ -1,8 +1,11 @@
-import shap
-from joblib import load
 import numpy as np
 import pandas as pd
 from factor_weightage import get_weightage
+from model_bundle import DEFAULT_EXPLANATION, DEFAULT_MODEL_PATH, EXPLANATION_MODES, get_model_bundle
+from prediction_cache import prediction_keys
+
+# Summary of rows scored with explanation mode "none"
+NO_EXPLANATION_SUMMARY = "The predicted score was computed without an explanation."
 
 def align_columns_with_original_values(original_data, livedata):
     # Identify columns missing in livedata
@@ -17,12 +20,30 @@ def align_columns_with_original_values(original_data, livedata):
     
     return livedata
 
-def split_data(original_data):
+def align_with_model_columns(livedata, model_path=DEFAULT_MODEL_PATH):
+    """
+    Align a batch of any size with the columns the model was trained on, using the
+    model's feature schema: missing columns and values get the training defaults,
+    values are cast to the training dtypes and columns are put in training order.
+
+    Args:
+        livedata (pd.DataFrame): Candidate rows, possibly missing some feature columns.
+        model_path (str): Path to the saved model file.
+
+    Returns:
+        pd.DataFrame: Rows ready for split_data and scoring.
+    """
+    return get_model_bundle(model_path).schema.align(livedata)
+
+
+def split_data(original_data, schema=None):
     """
     Splits the original data into numerical and categorical features.
     
     Args:
         original_data (pd.DataFrame): The full dataset containing both numerical and categorical features.
+        schema (FeatureSchema): Optional feature schema of the model; its column lists are
+            used instead of inspecting the dtypes of the data.
     
     Returns:
         numerical_data (np.array): Numerical feature values.
@@ -31,8 +52,18 @@ def split_data(original_data):
         categorical_columns (Index): Column names for categorical data.
     """
     # Separate categorical and numerical columns
-    categorical_columns = original_data.select_dtypes(include=["object"]).columns
-    numerical_columns = original_data.select_dtypes(include=["int64", "float64"]).columns
+    if schema is not None:
+        categorical_columns = pd.Index(schema.categorical_columns)
+        numerical_columns = pd.Index(schema.numerical_columns)
+        if list(original_data.columns) == schema.columns:
+            # Aligned rows hold the categorical columns first: slice instead of selecting by name
+            n_categorical = len(categorical_columns)
+            numerical_data = original_data.iloc[:, n_categorical:].to_numpy()
+            categorical_data = original_data.iloc[:, :n_categorical].to_numpy()
+            return numerical_data, categorical_data, numerical_columns, categorical_columns
+    else:
+        categorical_columns = original_data.select_dtypes(include=["object"]).columns
+        numerical_columns = original_data.select_dtypes(include=["int64", "float64"]).columns
     
     # Extract numerical and categorical data
     numerical_data = original_data[numerical_columns].values
@@ -41,7 +72,18 @@ def split_data(original_data):
     return numerical_data, categorical_data, numerical_columns, categorical_columns
 
 
-def predict_with_weights_rf(model_path, numerical_data, categorical_data, numerical_weights, categorical_weights, numerical_columns, categorical_columns):
+def _weighted_features(bundle, numerical_data, categorical_data, numerical_weights, categorical_weights):
+    """
+    Encode, scale and weight a block of rows into the model's feature matrix.
+
+    Columns must be in the order the encoder and scaler were fitted with. Weights may be
+    a single vector applied to every row or a matrix with one weight vector per row.
+    """
+    return bundle.feature_encoder.weighted_features(numerical_data, categorical_data,
+                                                    np.asarray(numerical_weights), np.asarray(categorical_weights))
+
+
+def predict_with_weights_rf(model_path, numerical_data, categorical_data, numerical_weights, categorical_weights, numerical_columns, categorical_columns, explanation=DEFAULT_EXPLANATION):
     """
     Perform inference using a saved Random Forest model with feature weightage.
 
@@ -51,39 +93,51 @@ def predict_with_weights_rf(model_path, numerical_data, categorical_data, numeri
         categorical_data (np.array): Array of categorical feature values.
         numerical_weights (list): List of weights for numerical features.
         categorical_weights (list): List of weights for categorical features.
+        explanation (str): "shap", "path" or "none", see EXPLANATION_MODES.
 
     Returns:
         float: Predicted joining score.
-        np.array: SHAP values for each feature.
+        np.array: Contribution of each feature in the explanation mode, None for "none".
     """
-    # Load the saved model, scaler, and encoder
-    model = load(model_path)
-    scaler = load("models/scaler.joblib")
-    encoder = load("models/encoder.joblib")
-    
-    # Preprocess categorical features (one-hot encoding)
-    categorical_encoded = encoder.transform(pd.DataFrame(categorical_data, columns=categorical_columns))
-    
-    # Scale numerical features
-    numerical_scaled = scaler.transform(pd.DataFrame(numerical_data, columns=numerical_columns))
-    
-    # Apply feature weightage
-    weighted_numerical = numerical_scaled * np.array(numerical_weights)
-    weighted_categorical = categorical_encoded * np.array(categorical_weights)
-    
-    # Combine weighted features
-    features = np.hstack([weighted_categorical, weighted_numerical])
-    
-    # Initialize SHAP Explainer
-    explainer = shap.TreeExplainer(model)
+    # Model, scaler, encoder and explainer are loaded once and shared per process
+    bundle = get_model_bundle(model_path)
+
+    features = _weighted_features(bundle, numerical_data, categorical_data, numerical_weights, categorical_weights)
     
-    # Calculate SHAP values for the features
-    shap_values = explainer.shap_values(features)
+    # Explain the features (SHAP values or decision-path contributions)
+    contributions = bundle.explain(features, explanation)
     
     # Perform prediction
-    prediction = model.predict(features)[0]  # Extract single prediction
+    prediction = bundle.predict(features)[0]  # Extract single prediction
     
-    return prediction, shap_values
+    return prediction, contributions
+
+
+def predict_batch_with_weights_rf(model_path, numerical_data, categorical_data, numerical_weights, categorical_weights, numerical_columns, categorical_columns, explanation=DEFAULT_EXPLANATION):
+    """
+    Batched counterpart of predict_with_weights_rf: encodes, scales, predicts and
+    explains every row with a single call per stage.
+
+    Args:
+        model_path (str): Path to the saved Random Forest model file.
+        numerical_data (np.array): 2D array of numerical feature values, one row per candidate.
+        categorical_data (np.array): 2D array of categorical feature values, one row per candidate.
+        numerical_weights (np.array): Weights for numerical features, shared or one row per candidate.
+        categorical_weights (np.array): Weights for categorical features, shared or one row per candidate.
+        explanation (str): "shap", "path" or "none", see EXPLANATION_MODES.
+
+    Returns:
+        np.array: Predicted joining score for each row.
+        np.array: Contributions matrix with one row per candidate, None for "none".
+    """
+    bundle = get_model_bundle(model_path)
+
+    features = _weighted_features(bundle, numerical_data, categorical_data, numerical_weights, categorical_weights)
+
+    predictions = bundle.predict(features)
+    contributions = bundle.explain(features, explanation)
+
+    return predictions, contributions
 
 
 def get_top_factors(shap_values, all_columns):
@@ -106,18 +160,162 @@ def get_top_factors(shap_values, all_columns):
         'SHAP Importance': shap_importances
     })
     
-    # Sort by importance in descending order and take the top 10
-    feature_df = feature_df.sort_values(by='SHAP Importance', ascending=False).head(10)
+    # Sort by importance in descending order and take the top 10 (ties keep column order)
+    feature_df = feature_df.sort_values(by='SHAP Importance', ascending=False, kind='stable').head(10)
     
     return feature_df
 
 
-def predict(company, data):
+def get_top_factors_batch(shap_values, all_columns, top_n=10):
+    """
+    Get the top factors for every row of a contributions matrix in one vectorized step.
+
+    Args:
+        shap_values (np.array): SHAP values or path contributions, one row per candidate.
+        all_columns (list): List of all feature names, in feature matrix order.
+        top_n (int): Number of factors to keep per row.
+
+    Returns:
+        np.array: Feature names of shape (rows, top_n), most influential first.
+    """
+    # Stable sort so ties are broken by column order, same as get_top_factors
+    order = np.argsort(-np.abs(shap_values), axis=1, kind='stable')[:, :top_n]
+    return np.asarray(all_columns)[order]
+
+
+def build_summaries(top_factor_names):
+    """
+    Build the human readable summary for every row of top factor names.
+    """
+    return [
+        "The predicted score is arrived based on " + ",".join(row).replace('_', ' ') + "."
+        for row in top_factor_names.tolist()
+    ]
 
-    # Split data into numerical and categorical
-    numerical_data, categorical_data, numerical_columns, categorical_columns = split_data(data)
 
-    numerical_weights, categorical_weights = get_weightage(company, numerical_columns, categorical_columns)
+def build_explanation_summaries(contributions, all_columns, rows):
+    """
+    Build the summaries of a batch explained in any mode: the top factors of every row,
+    or the plain summary when it was scored with explanation mode "none".
+    """
+    if contributions is None:
+        return [NO_EXPLANATION_SUMMARY] * rows
+    return build_summaries(get_top_factors_batch(contributions, all_columns))
+
+
+def lookup_cached_predictions(cache, data, numerical_weights, categorical_weights, model_path=DEFAULT_MODEL_PATH, explanation=DEFAULT_EXPLANATION):
+    """
+    Look up aligned candidate rows in a prediction cache. Summaries depend on the
+    explanation mode, so each mode has its own entries.
+
+    Returns:
+        list: Cache key of every row.
+        dict: (score, summary) for every key found in the cache.
+        list: Positions of the rows that still have to be scored.
+    """
+    bundle = get_model_bundle(model_path)
+    # SHAP entries keep the plain model version so existing persistent caches stay valid
+    version = bundle.version if explanation == "shap" else f"{bundle.version}/{explanation}"
+    keys = prediction_keys(data, bundle.numerical_columns, numerical_weights, categorical_weights, version)
+    cached = cache.get_many(keys)
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    return keys, cached, missing
+
+
+def fill_cached_predictions(cache, keys, cached, missing, scored):
+    """
+    Store freshly scored rows in the cache and merge them with the cached ones.
+
+    Args:
+        scored (pd.DataFrame): Result of scoring the rows at the missing positions, in order.
+
+    Returns:
+        pd.DataFrame: Expected joining score and summary for every key, in order.
+    """
+    if missing:
+        fresh = list(zip([keys[i] for i in missing], scored['Expected_Joining_Score'], scored['Summary']))
+        cache.put_many(fresh)
+        cached = dict(cached)
+        cached.update((key, (score, summary)) for key, score, summary in fresh)
+
+    return pd.DataFrame({
+        'Expected_Joining_Score': [float(cached[key][0]) for key in keys],
+        'Summary': [cached[key][1] for key in keys],
+    })
+
+
+def select_weight_rows(weights, rows):
+    """
+    Select the weights of the given rows; shared weight vectors apply to every row as is.
+    """
+    weights = np.asarray(weights)
+    return weights[rows] if weights.ndim == 2 else weights
+
+
+def score_with_weights(data, numerical_weights, categorical_weights, model_path=DEFAULT_MODEL_PATH, batched=True, cache=None, explanation=DEFAULT_EXPLANATION):
+    """
+    Score aligned candidate rows with the given feature weights.
+
+    Args:
+        data (pd.DataFrame): Candidate rows aligned with the training columns.
+        numerical_weights (np.array): Weights for the numerical columns of data.
+        categorical_weights (np.array): Weights for the categorical columns of data.
+        model_path (str): Path to the saved model file.
+        batched (bool): Score the whole frame at once instead of one row at a time.
+        cache (PredictionCache): Optional cache; only rows missing from it are scored.
+        explanation (str): How summaries are explained: "shap" (exact SHAP values), "path"
+            (decision-path contributions, a fraction of the cost) or "none".
+
+    Returns:
+        pd.DataFrame: Expected joining score and summary for each row.
+    """
+    if explanation not in EXPLANATION_MODES:
+        raise ValueError(f"Unknown explanation mode {explanation!r}, expected one of {', '.join(EXPLANATION_MODES)}")
+
+    if cache is not None:
+        keys, cached, missing = lookup_cached_predictions(
+            cache, data, numerical_weights, categorical_weights, model_path=model_path, explanation=explanation
+        )
+        scored = None
+        if missing:
+            scored = score_with_weights(
+                data.iloc[missing],
+                select_weight_rows(numerical_weights, missing),
+                select_weight_rows(categorical_weights, missing),
+                model_path=model_path,
+                batched=batched,
+                explanation=explanation,
+            )
+        return fill_cached_predictions(cache, keys, cached, missing, scored)
+
+    bundle = get_model_bundle(model_path)
+
+    # Split data into numerical and categorical, in the column order the model was trained with
+    numerical_data, categorical_data, numerical_columns, categorical_columns = split_data(data, bundle.schema)
+
+    # Feature names in the same order as the columns of the weighted feature matrix
+    all_columns = np.array(bundle.feature_names)
+
+    if len(data) == 0:
+        return pd.DataFrame({'Expected_Joining_Score': [], 'Summary': []})
+
+    if batched:
+        predicted_scores, contributions = predict_batch_with_weights_rf(
+            model_path=model_path,
+            numerical_data=numerical_data,
+            categorical_data=categorical_data,
+            numerical_weights=numerical_weights,
+            categorical_weights=categorical_weights,
+            numerical_columns=numerical_columns,
+            categorical_columns=categorical_columns,
+            explanation=explanation,
+        )
+        summaries = build_explanation_summaries(contributions, all_columns, len(data))
+
+        return pd.DataFrame({
+            'Expected_Joining_Score' : predicted_scores,
+            'Summary' : summaries
+        })
 
     # Predict using Random Forest model and get SHAP values
     predicted_scores = []
@@ -126,25 +324,25 @@ def predict(company, data):
     for i in range(len(data)):  # Loop over each example
         # Predict and get SHAP values for the i-th example
         predicted_score, shap_values = predict_with_weights_rf(
-            model_path="models/random_forest_model.joblib",
+            model_path=model_path,
             numerical_data=numerical_data[i:i+1],  # Keep one row at a time
             categorical_data=categorical_data[i:i+1],  # Keep one row at a time
             numerical_weights=numerical_weights,
             categorical_weights=categorical_weights,
             numerical_columns=numerical_columns,
-            categorical_columns=categorical_columns
+            categorical_columns=categorical_columns,
+            explanation=explanation,
         )
 
         predicted_scores.append(predicted_score)
         shap_values_list.append(shap_values)
     
-    encoder = load("models/encoder.joblib")
-  
-    # Combine numerical and categorical columns
-    all_columns = np.array(numerical_columns.tolist() + encoder.get_feature_names_out(categorical_columns).tolist())
-    
     summaries = []
     for i, shap_values in enumerate(shap_values_list):
+        if shap_values is None:
+            summaries.append(NO_EXPLANATION_SUMMARY)
+            continue
+
         # Get the top 10 factors influencing the model decision based on SHAP for each input
         top_factors = get_top_factors(shap_values, all_columns)  # shap_values[1] for class 1 (for binary classification)
 
@@ -161,55 +359,25 @@ def predict(company, data):
     })
 
     return result
-    
 
-def inference(company, livedata):
 
-    # Original Data with multiple rows
-    original_data = pd.DataFrame({
-        'Candidate_Location': ['Mumbai', 'Delhi'],
-        'Distance_From_Job_Location (km)': [45, 31],
-        'Cost_of_Living_Area': ['High', 'Medium'],
-        'Current_Role': ['Analyst', 'Consultant'],
-        'Seniority_Level': ['Entry-Level', 'Senior-Level'],
-        'Experience_Years': [9, 5],
-        'Current_Salary (INR)': [1267561, 648688],
-        'Expected_Salary (INR)': [1255080, 2496952],
-        'Education_Qualification': ['Master\'s Degree', 'PhD'],
-        'Relevant_Skills': ['C++, Algorithms', 'Python, SQL, ML'],
-        'Certifications': ['PMP', 'Scrum Master'],
-        'Notice_Period (Days)': [10, 59],
-        'Planned_Leaves': [14, 4],
-        'Shift_Preference': ['Flexible', 'Flexible'],
-        'Service_Bond_Acceptance': ['No', 'No'],
-        'Work_Mode_Preference': ['Remote', 'Remote'],
-        'Current_Company_Name': ['Cognizant', 'Accenture'],
-        'Current_Company_Industry': ['Retail', 'IT Services'],
-        'Current_Company_Brand_Perception': ['Negative', 'Neutral'],
-        'Job_Hopping_History (Years)': [2, 8],
-        'Technology_Fit': ['Moderate', 'Low'],
-        'Offered_Salary (INR)': [2124620, 436382],
-        'Salary_Difference (INR)': [146611, 345689],
-        'Salary_Competitiveness': ['Above Average', 'Above Average'],
-        'Offered_Position_Level': ['Senior-Level', 'Mid-Level'],
-        'Offered_Job_Role': ['Developer', 'Data Analyst'],
-        'Job_Location': ['Madanapalle', 'Bangalore'],
-        'Relocation_Required': ['Yes', 'No'],
-        'Benefits_Package': ['Stock Options', 'Stock Options'],
-        'Career_Growth_Opportunities': ['Excellent', 'Limited'],
-        'Job_Security': ['Stable', 'Strong'],
-        'Offer_Company_Brand_Value': ['High', 'High'],
-        'Offer_Validity_Date': ['12/31/2024 14:11', '1/12/2025 14:11'],
-        'Offer_Letter_Clarity': ['Ambiguous', 'Clear'],
-    })
+def predict(company, data, model_path=DEFAULT_MODEL_PATH, batched=True, cache=None, explanation=DEFAULT_EXPLANATION):
+
+    bundle = get_model_bundle(model_path)
+    numerical_weights, categorical_weights = get_weightage(company, bundle.numerical_columns, bundle.categorical_columns)
 
+    return score_with_weights(data, numerical_weights, categorical_weights, model_path=model_path,
+                              batched=batched, cache=cache, explanation=explanation)
+    
+
+def inference(company, livedata, model_path=DEFAULT_MODEL_PATH, explanation=DEFAULT_EXPLANATION):
 
-    livedata_aligned = align_columns_with_original_values(original_data, livedata)
-    result = predict(company, livedata_aligned)
+    # Missing columns and values are filled from the defaults learned on the training data
+    livedata_aligned = align_with_model_columns(livedata, model_path=model_path)
+    result = predict(company, livedata_aligned, model_path=model_path, explanation=explanation)
 
     return result
 
-    
 
 # Example usage with actual input
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Two independent 64-bit row hashes give a 128-bit content address per row
+_ROW_HASH_KEYS = ("recruitmentrad01", "recruitmentrad02")
+
+_SQLITE_BATCH_SIZE = 500
+
+
+def prediction_keys(data, numerical_columns, numerical_weights, categorical_weights, model_version):
+    """
+    Build a stable cache key for every row of aligned candidate data.
+
+    The key covers the feature values, the weights applied to the row and the model
+    artifact version, so a key only ever maps to one possible prediction.
+
+    Args:
+        data (pd.DataFrame): Candidate rows aligned with the training columns.
+        numerical_columns (list): Numerical columns of data, hashed as float64 so 45 and 45.0 match.
+        numerical_weights (np.array): Weights for the numerical columns, shared or one row per candidate.
+        categorical_weights (np.array): Weights for the categorical columns, shared or one row per candidate.
+        model_version (str): Version of the model artifacts.
+
+    Returns:
+        list: One hex key per row of data.
+    """
+    rows = data.astype({col: "float64" for col in numerical_columns})
+    first = pd.util.hash_pandas_object(rows, index=False, hash_key=_ROW_HASH_KEYS[0]).values
+    second = pd.util.hash_pandas_object(rows, index=False, hash_key=_ROW_HASH_KEYS[1]).values
+
+    context = hashlib.blake2b(digest_size=8)
+    context.update(model_version.encode())
+    context.update("\x1f".join(map(str, data.columns)).encode())
+
+    numerical_weights = np.asarray(numerical_weights, dtype=float)
+    categorical_weights = np.asarray(categorical_weights, dtype=float)
+    if numerical_weights.ndim == 1 and categorical_weights.ndim == 1:
+        context.update(numerical_weights.tobytes())
+        context.update(categorical_weights.tobytes())
+        prefix = context.hexdigest()
+        return [f"{prefix}{a:016x}{b:016x}" for a, b in zip(first, second)]
+
+    # One weight vector per row
+    numerical_weights = np.broadcast_to(numerical_weights, (len(data), numerical_weights.shape[-1]))
+    categorical_weights = np.broadcast_to(categorical_weights, (len(data), categorical_weights.shape[-1]))
+    keys = []
+    for a, b, numerical, categorical in zip(first, second, numerical_weights, categorical_weights):
+        row_context = context.copy()
+        row_context.update(numerical.tobytes())
+        row_context.update(categorical.tobytes())
+        keys.append(f"{row_context.hexdigest()}{a:016x}{b:016x}")
+    return keys
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of (score, summary) pairs.
+
+    An in-memory LRU bounded by max_size serves hot entries. When a path is given,
+    entries are also written to a SQLite file so they survive restarts; disk hits are
+    promoted back into memory. Entries older than ttl_seconds are ignored and evicted.
+
+    The file is pruned as entries are written: expired rows are deleted and, past
+    max_disk_size rows, the oldest ones. Disk reads and writes hold a lock of their own,
+    so lookups answered from memory never wait on SQLite.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=None, path=None, max_disk_size=1000000):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        self.path = path or None
+        self.max_disk_size = max_disk_size
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._connection = None
+        if self.path:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                "key TEXT PRIMARY KEY, score REAL NOT NULL, summary TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_prediction_cache_stored_at ON prediction_cache (stored_at)"
+            )
+            self._connection.commit()
+            # Upper bound of the rows on disk, recounted whenever it passes max_disk_size
+            self._disk_rows = self._connection.execute("SELECT COUNT(*) FROM prediction_cache").fetchone()[0]
+
+    def get_many(self, keys):
+        """
+        Look up several keys at once.
+
+        Returns:
+            dict: (score, summary) for every key that was found.
+        """
+        now = time.time()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self._expired(entry[2], now):
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = (entry[0], entry[1])
+
+        disk_rows = []
+        if missing and self._connection is not None:
+            with self._disk_lock:
+                disk_rows = [row for row in self._select(missing) if not self._expired(row[3], now)]
+
+        with self._lock:
+            for key, score, summary, stored_at in disk_rows:
+                found[key] = (score, summary)
+                self._store(key, score, summary, stored_at)
+            self._disk_hits += len(disk_rows)
+
+            hits = sum(1 for key in keys if key in found)
+            self._hits += hits
+            self._misses += len(keys) - hits
+
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, score, summary) triples.
+        """
+        now = time.time()
+        items = [(key, float(score), summary) for key, score, summary in items]
+
+        with self._lock:
+            for key, score, summary in items:
+                self._store(key, score, summary, now)
+
+        if self._connection is not None:
+            with self._disk_lock:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO prediction_cache (key, score, summary, stored_at) VALUES (?, ?, ?, ?)",
+                    [(key, score, summary, now) for key, score, summary in items],
+                )
+                self._disk_rows += len(items)
+                self._prune(now)
+                self._connection.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._connection is not None:
+            with self._disk_lock:
+                self._connection.execute("DELETE FROM prediction_cache")
+                self._connection.commit()
+                self._disk_rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else None,
+                "evictions": self._evictions,
+                "persistent": self._connection is not None,
+            }
+
+    def _expired(self, stored_at, now):
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def _store(self, key, score, summary, stored_at):
+        self._entries[key] = (score, summary, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _prune(self, now):
+        # Expired rows go on every write, through the stored_at index; the row count is
+        # only checked once replacements may have taken the file past max_disk_size
+        if self.ttl_seconds is not None:
+            deleted = self._connection.execute(
+                "DELETE FROM prediction_cache WHERE stored_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            self._disk_rows -= deleted
+        if self.max_disk_size is None or self._disk_rows <= self.max_disk_size:
+            return
+        self._disk_rows = self._connection.execute("SELECT COUNT(*) FROM prediction_cache").fetchone()[0]
+        excess = self._disk_rows - self.max_disk_size
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM prediction_cache WHERE key IN "
+                "(SELECT key FROM prediction_cache ORDER BY stored_at LIMIT ?)",
+                (excess,),
+            )
+            self._disk_rows = self.max_disk_size
+
+    def _select(self, keys):
+        rows = []
+        for start in range(0, len(keys), _SQLITE_BATCH_SIZE):
+            chunk = keys[start:start + _SQLITE_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self._connection.execute(
+                f"SELECT key, score, summary, stored_at FROM prediction_cache WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall())
+        return rows
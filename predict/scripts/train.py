@@ -1,33 +1,54 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
 from sklearn.preprocessing import StandardScaler, OrdinalEncoder
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.metrics import mean_absolute_error
-from joblib import dump
-import pandas as pd
+from joblib import Parallel, delayed, dump, effective_n_jobs, load
 import numpy as np
+from dataset_cache import TARGET_COLUMN, load_dataset
+from feature_schema import FEATURE_SCHEMA_FILE_NAME, FeatureSchema, load_feature_schema
+from model_bundle import DEFAULT_MODEL_PATH, ENCODER_FILE_NAME, SCALER_FILE_NAME, resolve_artifact_path
+from model_registry import ModelRegistry
+from tree_engine import export_model, file_sha256
+
+MODEL_FILE_NAMES = {
+    "decision_tree": "decision_tree_model.joblib",
+    "random_forest": "random_forest_model.joblib",
+}
+# Flat copies of the current artifacts, read by the command line scripts
+MODELS_DIR = "models"
+FOREST_TREES = 100
 
 
-def train_model(data_path, model_type="decision_tree"):
+def preprocess(data_path):
     """
-    Train a machine learning model (Decision Tree or Random Forest) on the given dataset using Ordinal Encoding.
+    Load the dataset through the columnar cache and fit the encoder and scaler on it.
 
     Args:
         data_path (str): Path to the dataset CSV file.
-        model_type (str): Type of model to train ("decision_tree" or "random_forest").
 
     Returns:
-        None
+        np.array: Preprocessed feature matrix (categorical columns first, then numerical).
+        np.array: Target values.
+        OrdinalEncoder: Encoder fitted on the categorical columns.
+        StandardScaler: Scaler fitted on the numerical columns.
+        FeatureSchema: Column layout, defaults and vocabularies used to align live rows.
     """
-    # Load data
-    data = pd.read_csv(data_path)
-    target_column = "Expected_Joining_Score"
-    X = data.drop(columns=[target_column])
-    y = data[target_column]
+    # Load data; column kinds come from the cached schema instead of dtype inference
+    data, schema = load_dataset(data_path, target_column=TARGET_COLUMN)
+    X = data.drop(columns=[TARGET_COLUMN])
+    y = data[TARGET_COLUMN]
 
     # Separate categorical and numerical columns
-    categorical_columns = X.select_dtypes(include=["object"]).columns
-    numerical_columns = X.select_dtypes(include=["int64", "float64"]).columns
+    categorical_columns = schema.categorical_columns
+    numerical_columns = schema.numerical_columns
 
     # Preprocess categorical data using Ordinal Encoder
     encoder = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)
@@ -40,38 +61,375 @@ def train_model(data_path, model_type="decision_tree"):
     # Combine preprocessed features
     X_processed = np.hstack((X_categorical, X_numerical))
 
-    # Split into train-test sets
-    X_train, X_test, y_train, y_test = train_test_split(X_processed, y, test_size=0.2, random_state=42)
+    return X_processed, y.to_numpy(), encoder, scaler, FeatureSchema.from_training_data(X, encoder, scaler)
+
+
+def encode_features(data, encoder, scaler, feature_schema):
+    """
+    Encode a dataset with an already fitted encoder and scaler.
+
+    Rows are aligned with the feature schema first, so missing values take the training
+    defaults and categories the encoder has not seen become -1; new rows can be fed to
+    an existing model without refitting the preprocessing.
 
-    # Select model type
+    Returns:
+        np.array: Feature matrix (categorical columns first, then numerical).
+    """
+    aligned = feature_schema.align(data)
+    X_categorical = encoder.transform(aligned[feature_schema.categorical_columns])
+    X_numerical = scaler.transform(aligned[feature_schema.numerical_columns])
+    return np.hstack((X_categorical, X_numerical))
+
+
+def build_model(model_type, n_jobs=None, n_estimators=FOREST_TREES, random_state=42):
+    """
+    Create an unfitted model of the given type.
+
+    Args:
+        model_type (str): Type of model ("decision_tree" or "random_forest").
+        n_jobs (int): Cores used by the random forest to fit its trees.
+        n_estimators (int): Trees of the random forest.
+    """
     if model_type == "decision_tree":
-        model = DecisionTreeRegressor(max_depth=10, random_state=42)
-        model_name = "decision_tree_model.joblib"
+        return DecisionTreeRegressor(max_depth=10, random_state=random_state)
     elif model_type == "random_forest":
-        model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
-        model_name = "random_forest_model.joblib"
-    else:
+        return RandomForestRegressor(n_estimators=n_estimators, max_depth=10, random_state=random_state,
+                                     n_jobs=n_jobs)
+    raise ValueError("Invalid model type. Choose 'decision_tree' or 'random_forest'.")
+
+
+def split_trees(n_estimators, n_parts):
+    """
+    Tree counts of at most n_parts forests that add up to n_estimators.
+    """
+    n_parts = max(1, min(n_parts, n_estimators))
+    return [n_estimators // n_parts + (part < n_estimators % n_parts) for part in range(n_parts)]
+
+
+def merge_forests(forests):
+    """
+    Combine random forests fitted on the same rows into the first one, which then
+    averages all of their trees.
+    """
+    model = forests[0]
+    for forest in forests[1:]:
+        model.estimators_ += forest.estimators_
+    model.n_estimators = len(model.estimators_)
+    return model
+
+
+def fit_and_evaluate(model_type, X, y, train_index, test_index, n_jobs=None):
+    """
+    Fit a model on the train rows and measure its MAE on the test rows.
+
+    Returns:
+        model: The fitted model.
+        float: Mean absolute error on the test rows.
+        float: Wall time of the fit in seconds.
+    """
+    model = build_model(model_type, n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    seconds = time.perf_counter() - start
+
+    mae = mean_absolute_error(y[test_index], model.predict(X[test_index]))
+    return model, mae, seconds
+
+
+def save_model(model, model_path):
+    """
+    Save a fitted model with joblib and its compiled node tables next to it, which the
+    serving side memory-maps instead of unpickling the model in every worker.
+    """
+    dump(model, model_path)
+    export_model(model_path, model)
+
+
+def publish_model(registry, model_type, model, encoder, scaler, feature_schema, metadata, activate=True):
+    """
+    Publish a fitted model with its encoder, scaler and feature schema as a new registry
+    version, and optionally make it the current one.
+
+    Returns:
+        str: The version id.
+    """
+    staging_dir = registry.new_staging_dir(model_type)
+    try:
+        model_file = MODEL_FILE_NAMES[model_type]
+        save_model(model, os.path.join(staging_dir, model_file))
+        dump(scaler, os.path.join(staging_dir, SCALER_FILE_NAME))
+        dump(encoder, os.path.join(staging_dir, ENCODER_FILE_NAME))
+        feature_schema.save(os.path.join(staging_dir, FEATURE_SCHEMA_FILE_NAME))
+        version = registry.publish(model_type, staging_dir, model_file, metadata)
+    finally:
+        if os.path.isdir(staging_dir):
+            shutil.rmtree(staging_dir)
+
+    if activate:
+        registry.set_current(model_type, version)
+    return version
+
+
+def export_version(registry, model_type, version, models_dir=MODELS_DIR):
+    """
+    Copy a registry version's artifacts over the flat files in models_dir. Every file is
+    replaced atomically, so a reader never sees a truncated artifact.
+    """
+    version_dir = registry.version_dir(model_type, version)
+    models_dir = resolve_artifact_path(models_dir)
+    model_file = MODEL_FILE_NAMES[model_type]
+    for name in (SCALER_FILE_NAME, ENCODER_FILE_NAME, FEATURE_SCHEMA_FILE_NAME, model_file):
+        target = os.path.join(models_dir, name)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(os.path.join(version_dir, name), tmp_path)
+        os.replace(tmp_path, target)
+    export_model(os.path.join(models_dir, model_file))
+
+
+def training_metadata(data_path, rows, **fields):
+    """
+    Metadata shared by every registry version: where the training data came from and its hash.
+    """
+    return dict(
+        fields,
+        created_at=datetime.utcnow().isoformat(),
+        training_data={"path": data_path, "sha256": file_sha256(data_path), "rows": rows},
+        feature_schema=FEATURE_SCHEMA_FILE_NAME,
+    )
+
+
+def train_model(data_path, model_type="decision_tree", registry=None):
+    """
+    Train a machine learning model (Decision Tree or Random Forest) on the given dataset using Ordinal Encoding.
+
+    The model is published as a new registry version, made current and copied to models/.
+
+    Args:
+        data_path (str): Path to the dataset CSV file.
+        model_type (str): Type of model to train ("decision_tree" or "random_forest").
+        registry (ModelRegistry): Registry to publish to, the default one if not given.
+
+    Returns:
+        str: The version id.
+    """
+    if model_type not in MODEL_FILE_NAMES:
         raise ValueError("Invalid model type. Choose 'decision_tree' or 'random_forest'.")
 
-    # Train the model
-    model.fit(X_train, y_train)
+    X_processed, y, encoder, scaler, feature_schema = preprocess(data_path)
+
+    # Split into train-test sets
+    train_index, test_index = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+
+    # Train the model, using every core for the forest
+    model, mae, seconds = fit_and_evaluate(model_type, X_processed, y, train_index, test_index, n_jobs=-1)
+    if model_type == "random_forest":
+        # n_jobs is pickled with the forest: the serving processes size their own parallelism,
+        # so the saved model predicts on the calling thread
+        model.set_params(n_jobs=None)
 
     # Save the model, scaler, and encoder
-    dump(model, f"models/{model_name}")
-    dump(scaler, "models/scaler.joblib")
-    dump(encoder, "models/encoder.joblib")
-    print(f"{model_type.replace('_', ' ').capitalize()} model, scaler, and encoder saved successfully.")
+    registry = registry or ModelRegistry()
+    metadata = training_metadata(data_path, len(y), model_type=model_type, metrics={"mae": mae}, fit_seconds=seconds)
+    version = publish_model(registry, model_type, model, encoder, scaler, feature_schema, metadata)
+    export_version(registry, model_type, version)
+    print(f"{model_type.replace('_', ' ').capitalize()} model, scaler, and encoder saved successfully as version {version}.")
 
     # Evaluate the model
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
     print(f"Mean Absolute Error: {mae:.2f}")
+    return version
+
+
+def train_models(data_path, model_types=("decision_tree", "random_forest"), n_folds=5, n_jobs=-1, registry=None):
+    """
+    Train several model types and their cross-validation folds in parallel.
+
+    The dataset is preprocessed once and the encoded matrix is memory-mapped from a
+    temporary file, so every worker process reads the same pages instead of receiving
+    its own copy. Each model type gets n_folds cross-validation fits plus a final fit
+    on the usual train split, all scheduled as independent jobs across the cores; random
+    forests are fitted as chunks of their trees, so a forest no longer fits on a single
+    core while the others sit idle. Each final model is published as a new registry
+    version, made current and copied to models/.
+
+    Args:
+        data_path (str): Path to the dataset CSV file.
+        model_types (tuple): Model types to train.
+        n_folds (int): Cross-validation folds per model type, 0 to skip cross-validation.
+        n_jobs (int): Worker processes, -1 for all cores.
+        registry (ModelRegistry): Registry to publish to, the default one if not given.
+
+    Returns:
+        dict: Per model type, the held-out MAE, mean cross-validation MAE, summed fit time,
+            wall time from the start of training until its last job finished and the version id.
+    """
+    for model_type in model_types:
+        if model_type not in MODEL_FILE_NAMES:
+            raise ValueError("Invalid model type. Choose 'decision_tree' or 'random_forest'.")
+
+    X_processed, y, encoder, scaler, feature_schema = preprocess(data_path)
+    registry = registry or ModelRegistry()
+
+    train_index, test_index = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=42).split(X_processed)) if n_folds else []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Share one read-only copy of the data with every worker
+        X_path = os.path.join(tmp_dir, "X.joblib")
+        y_path = os.path.join(tmp_dir, "y.joblib")
+        dump(X_processed, X_path)
+        dump(y, y_path)
+        X_shared = load(X_path, mmap_mode="r")
+        y_shared = load(y_path, mmap_mode="r")
+
+        # A forest fit is the longest job: each one is split into tree chunks so that
+        # together they cover the cores, and merged back once all of its chunks are in
+        forests = len(folds) + 1 if "random_forest" in model_types else 0
+        parts = split_trees(FOREST_TREES, -(-effective_n_jobs(n_jobs) // forests)) if forests else []
+
+        jobs = []
+        splits = {}
+        for model_type in model_types:
+            for fold, (fold_train, fold_test) in [(None, (train_index, test_index))] + list(enumerate(folds)):
+                splits[model_type, fold] = fold_train, fold_test
+                if model_type == "random_forest":
+                    jobs += [(model_type, fold, part, n_trees, fold_train) for part, n_trees in enumerate(parts)]
+                else:
+                    jobs.append((model_type, fold, 0, None, fold_train))
+
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+            delayed(_fit_job)(model_type, fold, part, n_trees, X_shared, y_shared, fold_train)
+            for model_type, fold, part, n_trees, fold_train in jobs
+        )
+
+        report = {
+            model_type: {"mae": None, "cv_mae": [], "fit_seconds": 0.0, "wall_seconds": 0.0, "version": None}
+            for model_type in model_types
+        }
+        final_models = {}
+        fitted = {}
+        for model_type, fold, part, model, seconds in results:
+            entry = report[model_type]
+            entry["fit_seconds"] += seconds
+            chunks = fitted.setdefault((model_type, fold), {})
+            chunks[part] = model
+            if model_type == "random_forest":
+                if len(chunks) < len(parts):
+                    continue
+                # Merged in part order, so the trees do not depend on which chunk finished first
+                model = merge_forests([chunks[part] for part in sorted(chunks)])
+            _, fold_test = splits[model_type, fold]
+            mae = mean_absolute_error(y_shared[fold_test], model.predict(X_shared[fold_test]))
+            entry["wall_seconds"] = time.perf_counter() - start
+            if fold is None:
+                entry["mae"] = mae
+                final_models[model_type] = model
+            else:
+                entry["cv_mae"].append(mae)
+
+    for model_type, entry in report.items():
+        entry["cv_mae"] = float(np.mean(entry["cv_mae"])) if entry["cv_mae"] else None
+        metadata = training_metadata(
+            data_path, len(y), model_type=model_type, metrics={"mae": entry["mae"], "cv_mae": entry["cv_mae"]},
+            fit_seconds=entry["fit_seconds"], cv_folds=n_folds,
+        )
+        entry["version"] = publish_model(registry, model_type, final_models[model_type], encoder, scaler,
+                                         feature_schema, metadata)
+        export_version(registry, model_type, entry["version"])
+
+        cv = f", CV MAE: {entry['cv_mae']:.2f}" if entry["cv_mae"] is not None else ""
+        print(f"{model_type.replace('_', ' ').capitalize()} model saved as version {entry['version']}. "
+              f"Mean Absolute Error: {entry['mae']:.2f}{cv}, "
+              f"fit time: {entry['fit_seconds']:.1f}s, wall time: {entry['wall_seconds']:.1f}s")
+
+    return report
+
+
+def update_model(data_path, model_path=None, n_new_trees=20, registry=None, activate=False):
+    """
+    Add trees fitted on newly labeled rows to an existing random forest.
+
+    The forest is warm-started: its current trees are kept as they are and only
+    n_new_trees new ones are fitted, on the rows in data_path alone, so the cost grows
+    with the new data rather than the full history. The encoder, scaler and feature
+    schema are reused unchanged and the result is published as a new registry version
+    whose metadata records the version it was built from.
+
+    Args:
+        data_path (str): CSV file with the new rows and their Expected_Joining_Score.
+        model_path (str): Random forest to extend; the scaler and encoder are read from its
+            directory. Defaults to the current random forest version, or models/ without one.
+        n_new_trees (int): Trees added to the forest.
+        registry (ModelRegistry): Registry to publish to, the default one if not given.
+        activate (bool): Make the new version the current one.
+
+    Returns:
+        str: Path of the updated model.
+    """
+    registry = registry or ModelRegistry()
+    model_type = "random_forest"
+    base_version = None
+    if model_path is None:
+        base_version = registry.current_version(model_type)
+        model_path = registry.model_path(model_type, base_version) if base_version else DEFAULT_MODEL_PATH
+
+    model_path = resolve_artifact_path(model_path)
+    model_dir = os.path.dirname(model_path)
+    model = load(model_path)
+    if not isinstance(model, RandomForestRegressor):
+        raise ValueError("Only random forest models can be updated incrementally.")
+
+    encoder = load(os.path.join(model_dir, ENCODER_FILE_NAME))
+    scaler = load(os.path.join(model_dir, SCALER_FILE_NAME))
+    feature_schema = load_feature_schema(model_dir, encoder, scaler)
+
+    data, _ = load_dataset(data_path, target_column=TARGET_COLUMN)
+    X = encode_features(data, encoder, scaler, feature_schema)
+    y = data[TARGET_COLUMN].to_numpy()
+
+    base_trees = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=base_trees + n_new_trees, n_jobs=-1)
+    start = time.perf_counter()
+    model.fit(X, y)
+    seconds = time.perf_counter() - start
+    # Both are pickled with the forest: restore the defaults so the saved model neither
+    # predicts on every core nor keeps growing if it is fitted again
+    model.set_params(warm_start=False, n_jobs=None)
+
+    metadata = training_metadata(
+        data_path, len(y), model_type=model_type, base_model=model_path, parent_version=base_version,
+        base_trees=base_trees, trees=len(model.estimators_), fit_seconds=seconds,
+    )
+    version = publish_model(registry, model_type, model, encoder, scaler, feature_schema, metadata, activate=activate)
+    updated_path = registry.model_path(model_type, version)
+
+    print(f"Added {n_new_trees} trees fitted on {len(y)} new rows in {seconds:.1f}s. "
+          f"Model saved as version {version} to {updated_path}")
+    return updated_path
+
+
+def _fit_job(model_type, fold, part, n_trees, X, y, train_index):
+    # Every chunk of a forest draws its trees from its own seed
+    model = build_model(model_type, n_jobs=1, n_estimators=n_trees, random_state=42 + part)
+    start = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    return model_type, fold, part, model, time.perf_counter() - start
 
 
 # Example Usage
 if __name__ == "__main__":
-    # Train Decision Tree
-    train_model(data_path="data/weighted_candidate_data_updated.csv", model_type="decision_tree")
+    parser = argparse.ArgumentParser(description="Train the joining score models.")
+    parser.add_argument("--data-path", default="data/weighted_candidate_data_updated.csv")
+    parser.add_argument("--update", action="store_true",
+                        help="Add trees fitted on the rows in --data-path to an existing random forest")
+    parser.add_argument("--model-path", help="Random forest extended by --update, the current version by default")
+    parser.add_argument("--new-trees", type=int, default=20, help="Trees added by --update")
+    parser.add_argument("--activate", action="store_true", help="Make the version built by --update the current one")
+    args = parser.parse_args()
 
-    # Train Random Forest
-    train_model(data_path="data/weighted_candidate_data_updated.csv", model_type="random_forest")
+    if args.update:
+        update_model(args.data_path, model_path=args.model_path, n_new_trees=args.new_trees, activate=args.activate)
+    else:
+        # Train Decision Tree and Random Forest, with their cross-validation folds, in parallel
+        train_models(data_path=args.data_path)
@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+TREES_DIR_SUFFIX = ".trees"
+META_FILE_NAME = "meta.json"
+NODE_ARRAYS = ("feature", "threshold", "children", "missing_left", "value", "roots")
+
+# (row, tree) pairs traversed at once by predict; bounds the temporary arrays of a batch
+_MAX_LANES = 1 << 20
+
+
+class TreeEnsemble:
+    """
+    Regression trees flattened into contiguous node tables.
+
+    Every tree's nodes are stored back to back; children holds the global (left, right)
+    node indices of every node and roots the index of each tree's first node. Leaves
+    point to themselves with an infinite threshold, so every row can take the same
+    number of steps regardless of the depth it reaches a leaf at.
+
+    Predictions match sklearn exactly: rows are cast to float32 and compared with the
+    float64 thresholds like sklearn does, and forest outputs are summed tree by tree in
+    estimator order before dividing by the number of trees.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots, max_depth, n_features, average):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        # Forests average their trees, a single decision tree returns its leaf value
+        self.average = average
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """
+        Leaf index reached in every tree by every row, shape (rows, trees).
+        """
+        return self._traverse(_as_sklearn_values(X)).T
+
+    def predict(self, X):
+        """
+        Predict a 2D batch with level-wise traversal of every (row, tree) pair at once.
+        """
+        X = np.asarray(X)
+        rows_per_block = max(1, _MAX_LANES // self.n_trees)
+        return np.concatenate([
+            self._leaf_values_to_predictions(self.value.take(self.apply(X[start:start + rows_per_block])))
+            for start in range(0, len(X), rows_per_block)
+        ]) if len(X) else np.empty(0)
+
+    @property
+    def expected_value(self):
+        """
+        Mean root value: the prediction before any split, the base of contributions().
+        """
+        return float(self.value.take(self.roots).mean())
+
+    def contributions(self, X):
+        """
+        Decision-path attribution of a 2D batch, accumulated during the same level-wise
+        traversal predict uses.
+
+        Every split a row passes credits the change between the parent's and the child's
+        mean value to the split feature. Averaged over the trees, a row's contributions
+        plus expected_value add up to its prediction.
+
+        Returns:
+            np.array: Contribution of every feature to every row, shape (rows, features).
+        """
+        X = np.asarray(X)
+        rows_per_block = max(1, _MAX_LANES // self.n_trees)
+        blocks = []
+        for start in range(0, len(X), rows_per_block):
+            block = _as_sklearn_values(X[start:start + rows_per_block])
+            contributions = np.zeros(block.size)
+            self._traverse(block, contributions)
+            blocks.append(contributions.reshape(block.shape))
+        if not blocks:
+            return np.empty((0, self.n_features))
+        contributions = np.concatenate(blocks)
+        return contributions / self.n_trees if self.average else contributions
+
+    def _traverse(self, X, contributions=None):
+        # Leaf of every (tree, row) lane; when given, contributions (rows * features,
+        # flattened) is credited with every step's change in node value
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        children = self.children.ravel()
+        has_missing = np.isnan(values).any()
+
+        # Tree-major lanes keep each step's lookups within one tree's nodes
+        row_offsets = (np.arange(n_rows) * n_features)[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            positions = row_offsets + self.feature.take(node)
+            x = values.take(positions)
+            threshold = self.threshold.take(node)
+            if has_missing:
+                go_right = ~((x <= threshold) | (np.isnan(x) & self.missing_left.take(node)))
+            else:
+                go_right = x > threshold
+            child = children.take(2 * node + go_right)
+            if contributions is not None:
+                # Leaves point to themselves, so rows already at a leaf add zero
+                step = self.value.take(child) - self.value.take(node)
+                contributions += np.bincount(positions.ravel(), weights=step.ravel(), minlength=contributions.size)
+            node = child
+        return node
+
+    def predict_row(self, x):
+        """
+        Predict a single row given as a 1D array, without any batch bookkeeping.
+        """
+        x = _as_sklearn_values(x)
+        if np.isnan(x).any():
+            return self.predict(x[np.newaxis, :])[0]
+
+        children = self.children.ravel()
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = children[2 * node + (x[self.feature[node]] > self.threshold[node])]
+        return self._leaf_values_to_predictions(self.value.take(node)[np.newaxis, :])[0]
+
+    def _leaf_values_to_predictions(self, values):
+        if not self.average:
+            return values[:, 0]
+        # Sequential sum in estimator order, the same order sklearn accumulates in
+        return np.cumsum(values, axis=1)[:, -1] / self.n_trees
+
+    def save(self, directory, model_digest=None):
+        """
+        Write every node table as its own .npy file so they can be memory-mapped.
+
+        Files are replaced atomically: processes still mapping the previous tables keep
+        reading the old files instead of seeing them truncated.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in NODE_ARRAYS:
+            _replace_file(os.path.join(directory, f"{name}.npy"), lambda f, name=name: np.save(f, getattr(self, name)))
+        meta = {
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "average": self.average,
+            "n_trees": self.n_trees,
+            "model_sha256": model_digest,
+        }
+        _replace_file(os.path.join(directory, META_FILE_NAME), lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+
+def _replace_file(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _as_sklearn_values(X):
+    # sklearn evaluates trees on float32 inputs; widening back to float64 keeps those exact
+    # values while letting comparisons with the float64 thresholds skip a mixed-type loop
+    return np.asarray(X, dtype=np.float32).astype(np.float64)
+
+
+def compile_trees(model):
+    """
+    Flatten a fitted DecisionTreeRegressor or RandomForestRegressor into a TreeEnsemble.
+    """
+    average = hasattr(model, "estimators_")
+    trees = [estimator.tree_ for estimator in model.estimators_] if average else [model.tree_]
+    if any(tree.n_outputs != 1 for tree in trees):
+        raise ValueError("Only single-output regression trees can be compiled.")
+
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+    feature, threshold, children, missing_left, value = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        nodes = np.arange(tree.node_count) + offset
+        leaf = tree.children_left == -1
+
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([
+            np.where(leaf, nodes, tree.children_left + offset),
+            np.where(leaf, nodes, tree.children_right + offset),
+        ]))
+        missing_left.append(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)))
+        value.append(tree.value[:, 0, 0])
+
+    return TreeEnsemble(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+        missing_left=np.concatenate(missing_left).astype(bool),
+        value=np.concatenate(value).astype(np.float64),
+        roots=offsets.astype(np.intp),
+        max_depth=max(tree.max_depth for tree in trees),
+        n_features=int(model.n_features_in_),
+        average=average,
+    )
+
+
+def compiled_trees_path(model_path):
+    """
+    Directory holding the compiled node tables of a model file.
+    """
+    return os.path.splitext(model_path)[0] + TREES_DIR_SUFFIX
+
+
+def load_tree_ensemble(directory, mmap_mode="r"):
+    """
+    Load compiled node tables; by default they are memory-mapped read-only instead of read.
+
+    Returns:
+        TreeEnsemble: The trees.
+        dict: The metadata saved with them.
+    """
+    with open(os.path.join(directory, META_FILE_NAME)) as f:
+        meta = json.load(f)
+    # Plain ndarray views of the maps: same pages, without np.memmap's per-operation overhead
+    arrays = {
+        name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+        for name in NODE_ARRAYS
+    }
+    ensemble = TreeEnsemble(max_depth=meta["max_depth"], n_features=meta["n_features"], average=meta["average"],
+                            **arrays)
+    return ensemble, meta
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_model(model_path, model=None):
+    """
+    Compile a saved model and write its node tables next to it.
+
+    Returns:
+        str: Directory the tables were written to.
+    """
+    from joblib import load
+
+    if model is None:
+        model = load(model_path)
+    directory = compiled_trees_path(model_path)
+    compile_trees(model).save(directory, model_digest=file_sha256(model_path))
+    return directory
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile saved tree models into flat node tables.")
+    parser.add_argument("model_paths", nargs="+", help="Saved .joblib models, e.g. models/random_forest_model.joblib")
+    args = parser.parse_args()
+
+    for model_path in args.model_paths:
+        start = time.perf_counter()
+        directory = export_model(model_path)
+        print(f"Compiled {model_path} into {directory} in {time.perf_counter() - start:.2f}s")
@@ -1,7 +1,8 @@
-import pandas as pd
+from dataset_cache import load_dataset
 
 def load_data(path):
     """
-    Load dataset from the given path.
+    Load dataset from the given path, through the columnar dataset cache.
     """
-    return pd.read_csv(path)
+    data, _ = load_dataset(path)
+    return data
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import OrdinalEncoder, StandardScaler
+
+from feature_encoding import _DICT_LOOKUP_MAX_ROWS, FeatureEncoder
+
+TRAINING = pd.DataFrame({
+    # Missing values seen in training: NaN is one of the encoder's categories
+    "Certifications": ["PMP", "Scrum Master", np.nan, "PMP"],
+    "Location": ["Pune", "Delhi", "Mumbai", "Pune"],
+    "Experience": [1.0, 4.0, 7.0, 10.0],
+})
+CATEGORICAL = ["Certifications", "Location"]
+NUMERICAL = ["Experience"]
+
+# Known, missing, unseen and look-alike values in both kinds of column
+LIVE_VALUES = [
+    ("PMP", "Pune"),
+    (np.nan, "Delhi"),
+    (float("nan"), np.nan),
+    (None, None),
+    ("nan", "nan"),
+    ("Unknown", "Berlin"),
+]
+
+
+def _fitted(encoded_missing_value=np.nan):
+    encoder = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1,
+                             encoded_missing_value=encoded_missing_value)
+    encoder.fit(TRAINING[CATEGORICAL])
+    scaler = StandardScaler().fit(TRAINING[NUMERICAL])
+    return encoder, scaler
+
+
+def _live_rows(n_rows):
+    categorical = np.empty((n_rows, len(CATEGORICAL)), dtype=object)
+    for i in range(n_rows):
+        categorical[i] = LIVE_VALUES[i % len(LIVE_VALUES)]
+    numerical = np.arange(n_rows, dtype=np.float64)[:, np.newaxis]
+    return categorical, numerical
+
+
+@pytest.mark.parametrize("n_rows", [len(LIVE_VALUES), _DICT_LOOKUP_MAX_ROWS + len(LIVE_VALUES)])
+@pytest.mark.parametrize("encoded_missing_value", [np.nan, -2])
+def test_matches_sklearn_transform(n_rows, encoded_missing_value):
+    encoder, scaler = _fitted(encoded_missing_value)
+    categorical, numerical = _live_rows(n_rows)
+
+    features = FeatureEncoder(encoder, scaler).weighted_features(
+        numerical, categorical, np.ones(len(NUMERICAL)), np.ones(len(CATEGORICAL))
+    )
+
+    expected = np.hstack([
+        encoder.transform(pd.DataFrame(categorical, columns=CATEGORICAL)),
+        scaler.transform(pd.DataFrame(numerical, columns=NUMERICAL)),
+    ])
+    np.testing.assert_array_equal(features, expected)
+
+
+def test_same_codes_below_and_above_dict_lookup_cutoff():
+    encoder, scaler = _fitted()
+    feature_encoder = FeatureEncoder(encoder, scaler)
+    categorical, _ = _live_rows(_DICT_LOOKUP_MAX_ROWS + len(LIVE_VALUES))
+
+    small = feature_encoder.encode_into(categorical[:len(LIVE_VALUES)], np.empty((len(LIVE_VALUES), 2)))
+    large = feature_encoder.encode_into(categorical, np.empty((len(categorical), 2)))
+    np.testing.assert_array_equal(small, large[:len(LIVE_VALUES)])
+
+
+def test_unknown_category_raises_without_unknown_value():
+    encoder = OrdinalEncoder().fit(TRAINING[CATEGORICAL])
+    scaler = StandardScaler().fit(TRAINING[NUMERICAL])
+    categorical = np.array([["PMP", "Berlin"]], dtype=object)
+
+    with pytest.raises(ValueError, match="Berlin"):
+        FeatureEncoder(encoder, scaler).encode_into(categorical, np.empty((1, 2)))
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from dataset_cache import TARGET_COLUMN
+from model_bundle import resolve_artifact_path
+from predict import align_with_model_columns, score_with_weights
+
+MODEL_PATH = "models/decision_tree_model.joblib"
+DATA_PATH = "data/weighted_candidate_data_updated.csv"
+
+
+def _training_rows_missing(column, n_rows=50):
+    data = pd.read_csv(resolve_artifact_path(DATA_PATH))
+    return data[data[column].isna()].head(n_rows).drop(columns=[TARGET_COLUMN]).reset_index(drop=True)
+
+
+def _baseline_scores(rows):
+    # The original scoring path: sklearn preprocessing on the raw rows, unit weights
+    encoder = load(resolve_artifact_path("models/encoder.joblib"))
+    scaler = load(resolve_artifact_path("models/scaler.joblib"))
+    model = load(resolve_artifact_path(MODEL_PATH))
+    features = np.hstack([
+        encoder.transform(rows[list(encoder.feature_names_in_)]),
+        scaler.transform(rows[list(scaler.feature_names_in_)]),
+    ])
+    return model.predict(features)
+
+
+def test_missing_certifications_score_like_the_baseline():
+    rows = _training_rows_missing("Certifications")
+    assert len(rows)
+
+    aligned = align_with_model_columns(rows, model_path=MODEL_PATH)
+    assert aligned["Certifications"].isna().all()
+
+    n_numerical = len(aligned.select_dtypes("float64").columns)
+    result = score_with_weights(aligned, np.ones(n_numerical), np.ones(aligned.shape[1] - n_numerical),
+                                model_path=MODEL_PATH, explanation="none")
+    np.testing.assert_allclose(result["Expected_Joining_Score"].to_numpy(), _baseline_scores(rows))
+
+
+def test_absent_columns_take_the_default():
+    rows = _training_rows_missing("Certifications", n_rows=3).drop(columns=["Certifications", "Experience_Years"])
+
+    aligned = align_with_model_columns(rows, model_path=MODEL_PATH)
+    assert aligned["Certifications"].notna().all()
+    assert aligned["Experience_Years"].notna().all()
@@ -1,68 +1,105 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
-from models.company import Company, CompanyFactor
-from models.factor import Factor
-from schemas.company import CompanyCreate, CompanyOut, AddCompanyFactorsRequest
-from services.company import create_company, get_all_companies
+from db import get_async_db
+from models.company import Company
+from schemas.company import CompanyCreate, CompanyOut, AddCompanyFactorsRequest, BulkCompanyFactorsRequest, \
+    CompanyFactorsUpdateOut
+from schemas.prediction import RescoreJobOut
+from services.company import CompaniesNotFoundError, create_company, get_all_companies, set_company_factors
+from services.company_weights import company_weights
+from services.feature_store import FactorsNotFoundError
+from services.rescoring import describe_rescore_job, get_rescore_job, start_rescore_job
 
 router = APIRouter()
 
 @router.post("/", response_model=CompanyOut)
-def create_new_company(company: CompanyCreate, db: Session = Depends(get_db)):
-    return create_company(db, company)
+async def create_new_company(company: CompanyCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_company(db, company)
 
 @router.get("/", response_model=List[CompanyOut], summary="Get all companies")
-def list_companies(db: Session = Depends(get_db)):
+async def list_companies(db: AsyncSession = Depends(get_async_db)):
     """
     Fetch all companies from the database.
     """
-    return get_all_companies(db)
+    return await get_all_companies(db)
+
+
+async def _set_company_factors(db: AsyncSession, factor_weights: dict):
+    try:
+        counts = await set_company_factors(db, factor_weights)
+    except CompaniesNotFoundError as e:
+        detail = "Company not found" if len(factor_weights) == 1 else str(e)
+        raise HTTPException(status_code=404, detail=detail)
+    except FactorsNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Factor with ID {e.factor_ids[0]} not found")
+
+    # Scoring must pick up the new weights, and stored scores must be refreshed
+    job_ids = {}
+    for company_id in factor_weights:
+        company_weights.invalidate(company_id)
+        job = await db.run_sync(start_rescore_job, company_id)
+        job_ids[company_id] = job.job_id
+    return counts, job_ids
+
+
+def _factor_weights(request: AddCompanyFactorsRequest):
+    return {str(factor_data.factor_id): factor_data.weightage for factor_data in request.factors}
 
 
 @router.post("/companies/{company_id}/factors")
-def add_factors_to_company(
+async def add_factors_to_company(
     request: AddCompanyFactorsRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Validate if the company exists
-    company = db.query(Company).filter_by(company_id=str(request.company_id)).first()
+    company_id = str(request.company_id)
+    counts, job_ids = await _set_company_factors(db, {company_id: _factor_weights(request)})
+
+    return {
+        "message": "Factors successfully added/updated for the company",
+        "rescore_job_id": job_ids[company_id],
+        **counts,
+    }
+
+
+@router.post("/factors", response_model=CompanyFactorsUpdateOut)
+async def add_factors_to_companies(request: BulkCompanyFactorsRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Add or update factor weights of many companies at once, then re-score each of them.
+    All companies are updated in one transaction, or none if any company or factor is unknown.
+    """
+    factor_weights = {}
+    for company in request.companies:
+        factor_weights.setdefault(str(company.company_id), {}).update(_factor_weights(company))
+
+    counts, job_ids = await _set_company_factors(db, factor_weights)
+    return {"message": "Factors successfully added/updated for the companies", "rescore_job_ids": job_ids, **counts}
+
+
+@router.post("/{company_id}/rescore", response_model=RescoreJobOut)
+async def rescore_company_candidates(company_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Start a background job re-scoring every candidate with a stored prediction for the company.
+    """
+    company = await db.scalar(select(Company).filter_by(company_id=company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
-    # Validate if each factor exists
-    for factor_data in request.factors:
-        factor = db.query(Factor).filter_by(factor_id=str(factor_data.factor_id)).first()
-        if not factor:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Factor with ID {factor_data.factor_id} not found"
-            )
-
-    # Add factors with weightages to the company
-    for factor_data in request.factors:
-        existing_entry = (
-            db.query(CompanyFactor)
-            .filter_by(company_id=str(request.company_id), factor_id=str(factor_data.factor_id))
-            .first()
-        )
-        if existing_entry:
-            # Update existing entry
-            existing_entry.weightage = factor_data.weightage
-            existing_entry.is_active = True
-        else:
-            # Create a new entry
-            company_factor = CompanyFactor(
-                company_id=str(request.company_id),
-                factor_id=str(factor_data.factor_id),
-                weightage=factor_data.weightage,
-                is_active=True
-            )
-            db.add(company_factor)
-
-    db.commit()
-    return {"message": "Factors successfully added/updated for the company"}
+    job = await db.run_sync(start_rescore_job, company_id)
+    return describe_rescore_job(job)
+
+
+@router.get("/{company_id}/rescore-jobs/{job_id}", response_model=RescoreJobOut)
+async def get_rescore_job_progress(company_id: str, job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Progress and throughput of a re-scoring job.
+    """
+    job = await db.run_sync(get_rescore_job, company_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+
+    return describe_rescore_job(job)
 
@@ -1,9 +1,9 @@
 from typing import List
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
+from db import get_async_db
 from schemas.factor import FactorCreate, FactorResponse
 from services.factor import create_factor, get_all_factors
 
@@ -12,14 +12,14 @@ router = APIRouter()
 
 
 @router.post("/create/", response_model=FactorResponse)
-def create_new_factor(factor: FactorCreate, db: Session = Depends(get_db)):
-    return create_factor(db, factor)
+async def create_new_factor(factor: FactorCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_factor(db, factor)
 
 
 @router.get("/", response_model=List[FactorResponse], summary="Get all factors")
-def list_all_factors(db: Session = Depends(get_db)):
+async def list_all_factors(db: AsyncSession = Depends(get_async_db)):
     """
     Fetch all companies from the database.
     """
-    return get_all_factors(db)
+    return await get_all_factors(db)
 
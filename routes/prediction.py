@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import get_db
+from schemas.prediction import (
+    CandidateOutcomeIn,
+    CandidateOutcomeOut,
+    CandidateFeaturesOut,
+    CandidatePredictionOut,
+    PredictCandidateRequest,
+    PredictCandidatesRequest,
+    SetCandidateFactorsRequest,
+)
+from services.feature_store import FactorsNotFoundError, set_candidate_factors
+from services.outcomes import CandidateNotFoundError, export_outcomes, record_outcome
+from services.company_weights import CompanyNotFoundError
+from services.prediction import (
+    CandidatesNotFoundError,
+    PredictionBusyError,
+    PredictionTimeoutError,
+    predict_candidates,
+    prediction_cache,
+    scheduler,
+)
+
+router = APIRouter()
+
+
+async def _predict(db: Session, company_id: str, candidate_ids: List[str], coalesce=False):
+    try:
+        return await predict_candidates(db, company_id, candidate_ids, coalesce=coalesce)
+    except (CompanyNotFoundError, CandidatesNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PredictionBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PredictionTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+@router.post("/predict", response_model=List[CandidatePredictionOut])
+async def predict_candidates_batch(request: PredictCandidatesRequest, db: Session = Depends(get_db)):
+    """
+    Generate joining scores for several candidates with the company's factor weights.
+    """
+    if len(request.candidate_ids) > settings.PREDICTION_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.PREDICTION_MAX_BATCH_SIZE} candidates can be scored per request"
+        )
+    return await _predict(db, str(request.company_id), request.candidate_ids)
+
+
+@router.get("/predict/stats")
+def get_prediction_stats():
+    """
+    Micro-batching scheduler statistics and prediction cache hit/miss counters.
+    """
+    return {"scheduler": scheduler.stats(), "cache": prediction_cache.stats()}
+
+
+@router.post("/{candidate_id}/predict", response_model=CandidatePredictionOut)
+async def predict_candidate(
+    candidate_id: str,
+    request: PredictCandidateRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate the joining score of a candidate with the company's factor weights.
+
+    Args:
+        candidate_id (str): The ID of the candidate to score (UUID format).
+        request (PredictCandidateRequest): The company whose factor weights are applied.
+        db (Session): The database session dependency.
+
+    Returns:
+        CandidatePredictionOut: The predicted score and the factors behind it.
+    """
+    predictions = await _predict(db, str(request.company_id), [candidate_id], coalesce=True)
+    return predictions[0]
+
+
+@router.put("/{candidate_id}/factors", response_model=CandidateFeaturesOut)
+def set_factors_of_candidate(candidate_id: str, request: SetCandidateFactorsRequest, db: Session = Depends(get_db)):
+    """
+    Set factor values of a candidate and refresh its materialized feature row.
+    """
+    factor_values = {str(factor.factor_id): factor.factor_value for factor in request.factors}
+    try:
+        features = set_candidate_factors(db, candidate_id, factor_values)
+    except (CandidatesNotFoundError, FactorsNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"candidate_id": candidate_id, "features": features}
+
+
+@router.post("/{candidate_id}/outcome", response_model=CandidateOutcomeOut)
+def record_candidate_outcome(candidate_id: str, request: CandidateOutcomeIn, db: Session = Depends(get_db)):
+    """
+    Record the observed joining score of a candidate for the next incremental model update.
+    """
+    try:
+        outcome = record_outcome(db, candidate_id, request.expected_joining_score)
+    except CandidateNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "candidate_id": candidate_id,
+        "expected_joining_score": request.expected_joining_score,
+        "recorded_at": outcome.observed_at,
+    }
+
+
+@router.get("/outcomes/export")
+def export_candidate_outcomes(since: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """
+    Export the labeled rows recorded after `since` as CSV, ready for
+    `python scripts/train.py --update --data-path <file>`.
+    """
+    data = export_outcomes(db, since)
+    return Response(content=data.to_csv(index=False), media_type="text/csv")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from schemas.model import ModelStatusOut, ModelVersionsOut
+from services.model_serving import ModelVersionNotFoundError, model_server
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ModelVersionsOut)
+def list_model_versions():
+    """
+    Published versions of the served model, with the version this process serves and
+    the one the registry points at.
+    """
+    versions = [
+        {"version": metadata["version"], "created_at": metadata["created_at"], "metadata": metadata}
+        for metadata in model_server.registry.versions(model_server.model_name)
+    ]
+    return dict(model_server.status(), versions=versions)
+
+
+@router.post("/{version}/activate", response_model=ModelStatusOut)
+async def activate_model_version(version: str):
+    """
+    Load a published version in the background, switch new requests to it once it is
+    warmed up and make it the registry's current version. Requests already running
+    finish on the previous version.
+    """
+    try:
+        await run_in_threadpool(model_server.promote, version)
+    except ModelVersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return model_server.status()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
+from db import get_async_db
 from models.company import Company
 from models.schema import UserLogin
 from models.user import User
@@ -19,16 +21,16 @@ def hash_password(password: str) -> str:
 
 
 @router.post("/create/")
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
 
     print('model: ', User)
     # Check if the email is already registered
-    db_user = db.query(User).filter(User.email==user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email==user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Check if the company exists
-    db_company = db.query(Company).filter(Company.company_id==user.company_id).first()
+    db_company = await db.scalar(select(Company).filter(Company.company_id==user.company_id))
     if not db_company:
         raise HTTPException(status_code=404, detail="Company not found")
 
@@ -37,16 +39,17 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         name=user.name,
         email=user.email,
         role=user.role,
-        password_hash=hash_password(user.password),
+        # bcrypt is deliberately slow, keep it off the event loop
+        password_hash=await run_in_threadpool(hash_password, user.password),
         company_id=user.company_id,
     )
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
     except Exception as e:
-        db.rollback()  # Rollback the transaction in case of an error
+        await db.rollback()  # Rollback the transaction in case of an error
         raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
     return {
@@ -59,13 +62,13 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login/")
-def login_user(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def login_user(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
 
     if not db_user:
         raise HTTPException(status_code=404, detail="Invalid email or password")
 
-    if not pwd_context.verify(user.password, db_user.password_hash):
+    if not await run_in_threadpool(pwd_context.verify, user.password, db_user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     return {"message": "Login successful", "email": db_user.email}
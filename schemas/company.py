@@ -1,7 +1,7 @@
 from uuid import UUID
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from schemas.user import UserOut
 
@@ -38,4 +38,13 @@ class FactorWeightage(BaseModel):
 
 class AddCompanyFactorsRequest(BaseModel):
     company_id: UUID
-    factors: List[FactorWeightage]
\ No newline at end of file
+    factors: List[FactorWeightage]
+
+class BulkCompanyFactorsRequest(BaseModel):
+    companies: List[AddCompanyFactorsRequest]
+
+class CompanyFactorsUpdateOut(BaseModel):
+    message: str
+    created: int
+    updated: int
+    rescore_job_ids: Dict[str, str]  # By company_id
\ No newline at end of file
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+
+class ModelVersionOut(BaseModel):
+    version: str
+    created_at: str
+    metadata: Dict[str, Any]
+
+
+class ModelStatusOut(BaseModel):
+    model_name: str
+    active_version: Optional[str]
+    current_version: Optional[str]
+    model_path: str
+    activated_at: Optional[datetime]
+
+
+class ModelVersionsOut(ModelStatusOut):
+    versions: List[ModelVersionOut]
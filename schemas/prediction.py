@@ -0,0 +1,58 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class PredictCandidateRequest(BaseModel):
+    company_id: UUID
+
+
+class PredictCandidatesRequest(BaseModel):
+    company_id: UUID
+    candidate_ids: List[str] = Field(..., min_length=1)
+
+
+class CandidatePredictionOut(BaseModel):
+    candidate_id: str
+    expected_joining_score: float
+    summary: str
+
+
+class CandidateOutcomeIn(BaseModel):
+    expected_joining_score: float = Field(..., ge=1, le=1000)
+
+
+class CandidateOutcomeOut(BaseModel):
+    candidate_id: str
+    expected_joining_score: float
+    recorded_at: datetime
+
+
+class CandidateFactorValue(BaseModel):
+    factor_id: UUID
+    factor_value: str
+
+
+class SetCandidateFactorsRequest(BaseModel):
+    factors: List[CandidateFactorValue] = Field(..., min_length=1)
+
+
+class CandidateFeaturesOut(BaseModel):
+    candidate_id: str
+    features: Dict[str, Any]
+
+
+class RescoreJobOut(BaseModel):
+    job_id: str
+    company_id: str
+    status: str
+    total_candidates: int
+    processed_candidates: int
+    rows_per_second: Optional[float] = None
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scoring code lives in predict/scripts and uses flat imports between its modules
+PREDICT_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "predict", "scripts")
+if PREDICT_SCRIPTS_DIR not in sys.path:
+    sys.path.append(PREDICT_SCRIPTS_DIR)
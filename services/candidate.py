@@ -0,0 +1,183 @@
+import base64
+import binascii
+import json
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Float, Integer, and_, column, literal_column, or_, select, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import CANDIDATE_SEARCH_COLUMNS, Candidate, CandidateStatus
+
+# Terms beyond this many are ignored; each one narrows the result set further
+MAX_SEARCH_TERMS = 8
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _encode_token(values) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_token(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(candidate: Candidate) -> str:
+    """
+    Opaque token pointing just past the candidate in (created_at, candidate_id) order.
+    """
+    return _encode_token([candidate.created_at.isoformat(), candidate.candidate_id])
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, candidate_id = _decode_token(cursor)
+        return datetime.fromisoformat(created_at), str(candidate_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _decode_search_cursor(cursor: str):
+    try:
+        score, candidate_id = _decode_token(cursor)
+        return float(score), str(candidate_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+async def list_candidates(
+    db: AsyncSession,
+    size: int,
+    cursor: Optional[str] = None,
+    status: Optional[CandidateStatus] = None,
+    target_role: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    """
+    One page of candidates in (created_at, candidate_id) order, optionally filtered.
+
+    Pages are read by seeking past the last row of the previous page instead of with an
+    offset, so every page is one index range scan no matter how deep it is, and rows
+    inserted meanwhile never shift a page.
+
+    Returns:
+        list: Candidates of the page.
+        str: Cursor of the next page, None on the last page.
+
+    Raises:
+        InvalidCursorError: If the cursor was not issued by this function.
+    """
+    query = select(Candidate)
+    if status is not None:
+        query = query.where(Candidate.status == status)
+    if target_role is not None:
+        query = query.where(Candidate.target_role == target_role)
+    if location is not None:
+        query = query.where(Candidate.location == location)
+
+    if cursor is not None:
+        created_at, candidate_id = decode_cursor(cursor)
+        # The leading created_at >= bound keeps this a plain range scan on every database
+        query = query.where(
+            Candidate.created_at >= created_at,
+            or_(
+                Candidate.created_at > created_at,
+                and_(Candidate.created_at == created_at, Candidate.candidate_id > candidate_id),
+            ),
+        )
+
+    # One extra row tells whether there is a next page
+    query = query.order_by(Candidate.created_at, Candidate.candidate_id).limit(size + 1)
+    candidates = (await db.scalars(query)).all()
+
+    next_cursor = encode_cursor(candidates[size - 1]) if len(candidates) > size else None
+    return candidates[:size], next_cursor
+
+
+def search_terms(query: str):
+    """
+    Lower-cased words of a free-text query, without any of the search syntax characters
+    of MySQL or FTS5.
+    """
+    return re.findall(r"\w+", query.lower())[:MAX_SEARCH_TERMS]
+
+
+def _search_score(dialect_name: str, terms):
+    # Relevance of each matching candidate, higher is better, and the statement selecting
+    # the matching candidates with it
+    if dialect_name == "mysql":
+        score = match(
+            *(getattr(Candidate, name) for name in CANDIDATE_SEARCH_COLUMNS),
+            against=" ".join(f"+{term}*" for term in terms),
+        ).in_boolean_mode()
+        # A bare MATCH predicate is what lets MySQL answer it from the FULLTEXT index
+        return score, select(Candidate, score).where(score)
+    if dialect_name == "sqlite":
+        # bm25 is lower for better matches
+        matches = text(
+            "SELECT rowid, -bm25(candidates_fts) AS score FROM candidates_fts WHERE candidates_fts MATCH :query"
+        ).bindparams(query=" ".join(f'"{term}"*' for term in terms)).columns(
+            column("rowid", Integer), column("score", Float)
+        ).subquery("matches")
+        return matches.c.score, select(Candidate, matches.c.score).join(
+            matches, matches.c.rowid == literal_column(f"{Candidate.__tablename__}.rowid")
+        )
+    # No full-text index on other databases: every term must start a word of one of the
+    # columns, and all matches rank the same, so pages are in candidate_id order
+    score = literal_column("0.0", Float)
+    return score, select(Candidate, score).where(and_(*(
+        or_(*(
+            condition
+            for column_ in (getattr(Candidate, name) for name in CANDIDATE_SEARCH_COLUMNS)
+            for condition in (column_.istartswith(term, autoescape=True),
+                              column_.icontains(f" {term}", autoescape=True))
+        ))
+        for term in terms
+    )))
+
+
+async def search_candidates(db: AsyncSession, query: str, size: int, cursor: Optional[str] = None):
+    """
+    One page of the candidates matching a free-text query, most relevant first.
+
+    Every word of the query must match the start of a word in the candidate's name,
+    current role, target role or location, so "sen eng ber" finds a senior engineer in
+    Berlin. Matching and ranking use the full-text index (MySQL FULLTEXT, SQLite FTS5),
+    so the cost depends on the number of matches, not on the size of the table; other
+    databases fall back to an unranked LIKE scan. Pages
+    seek past the (relevance, candidate_id) of the previous page's last row.
+
+    Returns:
+        list: Candidates of the page.
+        str: Cursor of the next page, None on the last page.
+
+    Raises:
+        InvalidCursorError: If the cursor was not issued by this function.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+
+    score, statement = _search_score(db.get_bind().dialect.name, terms)
+    if cursor is not None:
+        last_score, candidate_id = _decode_search_cursor(cursor)
+        statement = statement.where(
+            or_(score < last_score, and_(score == last_score, Candidate.candidate_id > candidate_id))
+        )
+
+    # One extra row tells whether there is a next page
+    statement = statement.order_by(score.desc(), Candidate.candidate_id).limit(size + 1)
+    rows = (await db.execute(statement)).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        candidate, last_score = rows[size - 1]
+        next_cursor = _encode_token([last_score, candidate.candidate_id])
+    return [candidate for candidate, _ in rows[:size]], next_cursor
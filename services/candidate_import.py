@@ -0,0 +1,287 @@
+import asyncio
+import codecs
+import csv
+import json
+import time
+import uuid
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import Candidate, CandidateStatus
+from models.schema import CandidateCreate
+
+# Content types accepted by import_candidates, mapped to their format
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+DUPLICATE_EMAIL_ERROR = "Candidate with this email already exists"
+CONFLICT_ERROR = "Conflicts with an existing candidate"
+
+
+class UnsupportedImportFormatError(ValueError):
+    def __init__(self, content_type):
+        super().__init__(
+            f"Unsupported content type {content_type!r}, expected one of {', '.join(IMPORT_FORMATS)}"
+        )
+
+
+def import_format(content_type: str) -> str:
+    """
+    Format of an upload from its Content-Type header, ignoring parameters such as charset.
+
+    Raises:
+        UnsupportedImportFormatError: If the content type is neither CSV nor NDJSON.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise UnsupportedImportFormatError(content_type)
+    return IMPORT_FORMATS[media_type]
+
+
+async def _iter_lines(stream):
+    # Lines of a UTF-8 byte stream, decoded as the chunks arrive; a leading BOM is dropped
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class _RecordLines:
+    """
+    Line iterator handed to csv.reader for one record. The reader only asks for a line
+    past the last one when a quoted field is still open, so running out marks the
+    record as incomplete instead of ending it.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self.incomplete = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._lines)
+        except StopIteration:
+            self.incomplete = True
+            raise
+
+
+async def _iter_csv_rows(stream):
+    header = None
+    record = []
+    row_number = 0
+    async for line in _iter_lines(stream):
+        if not record and not line.strip():
+            continue
+        # A quoted field may span lines; csv's own quoting rules decide where the record
+        # ends, so a stray quote inside an unquoted field is just a character
+        record.append(line + "\n")
+        lines = _RecordLines(record)
+        values = next(csv.reader(lines), [])
+        if lines.incomplete:
+            continue
+        record = []
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells are missing values, so an empty email is no email
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        yield row_number + 1, "Unterminated quoted field"
+
+
+async def _iter_ndjson_rows(stream):
+    row_number = 0
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def iter_upload_rows(stream, upload_format: str):
+    """
+    (row number, row dict) pairs of a CSV or NDJSON upload read from an async byte
+    stream, or (row number, error message) for rows that cannot be parsed. CSV uploads
+    start with a header row naming the CandidateCreate fields; row numbers count data
+    rows only.
+    """
+    if upload_format == "csv":
+        return _iter_csv_rows(stream)
+    return _iter_ndjson_rows(stream)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+class CandidateImport:
+    """
+    Running totals and row errors of one import. At most max_errors errors are kept,
+    failed counts all of them.
+    """
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._started = time.perf_counter()
+        # Emails of the rows already imported, duplicates within the upload are rejected
+        self.seen_emails = set()
+
+    def fail(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "error": message})
+
+    def result(self):
+        seconds = time.perf_counter() - self._started
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.received / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+
+async def _existing_emails(db: AsyncSession, emails):
+    if not emails:
+        return set()
+    return set(await db.scalars(select(Candidate.email).where(Candidate.email.in_(emails))))
+
+
+def _validate_chunk(chunk, seen_emails):
+    # Rows of the chunk that passed CandidateCreate and (row number, error) of the others.
+    # Runs in a worker thread, so the report is left to the event loop; seen_emails is
+    # only used here, one chunk at a time
+    valid, failures = [], []
+    for row_number, row in chunk:
+        if isinstance(row, str):
+            failures.append((row_number, row))
+            continue
+        try:
+            candidate = CandidateCreate.model_validate(row)
+        except ValidationError as e:
+            failures.append((row_number, _validation_message(e)))
+            continue
+        if candidate.email is not None:
+            if candidate.email in seen_emails:
+                failures.append((row_number, "Email repeated in an earlier row of the upload"))
+                continue
+            seen_emails.add(candidate.email)
+        valid.append((row_number, candidate))
+    return valid, failures
+
+
+async def _insert_chunk(db: AsyncSession, report: CandidateImport, valid):
+    # A candidate created concurrently can still take an email between the check and
+    # the insert; the chunk is then checked again and retried without it. A chunk that
+    # fails again, or on another constraint, is reported as failed row by row
+    for attempt in range(2):
+        existing = await _existing_emails(db, [candidate.email for _, candidate in valid if candidate.email])
+        for row_number, candidate in valid:
+            if candidate.email in existing:
+                report.fail(row_number, DUPLICATE_EMAIL_ERROR)
+        valid = [(row_number, candidate) for row_number, candidate in valid if candidate.email not in existing]
+        if not valid:
+            return
+
+        now = datetime.now()
+        values = [
+            dict(
+                candidate.model_dump(),
+                candidate_id=str(uuid.uuid4()),
+                status=CandidateStatus.Pending,
+                created_at=now,
+                updated_at=now,
+            )
+            for _, candidate in valid
+        ]
+        try:
+            await db.execute(insert(Candidate), values)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            if attempt:
+                for row_number, _ in valid:
+                    report.fail(row_number, CONFLICT_ERROR)
+                return
+            continue
+        report.created += len(values)
+        return
+
+
+async def import_candidates(db: AsyncSession, rows, chunk_size: int, max_errors: int):
+    """
+    Create candidates from an async iterable of (row number, row) pairs, as yielded by
+    iter_upload_rows.
+
+    Rows are validated with CandidateCreate a chunk at a time, the chunk's emails are
+    checked against the table with one IN query and its valid rows are inserted with a
+    single executemany and committed, so a failed row never blocks the others and an
+    interrupted import keeps every chunk committed before it.
+
+    Returns:
+        dict: Rows received, created and failed, up to max_errors row errors, the
+            elapsed seconds and rows per second.
+    """
+    report = CandidateImport(max_errors)
+    inserting = None
+
+    async def flush(chunk):
+        nonlocal inserting
+        # Validation runs off the event loop, overlapping the previous chunk's insert
+        valid, failures = await run_in_threadpool(_validate_chunk, chunk, report.seen_emails)
+        for row_number, message in failures:
+            report.fail(row_number, message)
+        if inserting is not None:
+            await inserting
+        inserting = asyncio.ensure_future(_insert_chunk(db, report, valid))
+
+    chunk = []
+    try:
+        async for row_number, row in rows:
+            report.received += 1
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+    finally:
+        if inserting is not None:
+            await inserting
+    return report.result()
@@ -1,17 +1,126 @@
-from sqlalchemy.orm import Session
-from models.company import Company
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models.company import Company, CompanyFactor
+from models.factor import Factor
 from schemas.company import CompanyCreate
+from services.company_weights import CompanyNotFoundError
+from services.feature_store import FactorsNotFoundError
+
+
+class CompaniesNotFoundError(CompanyNotFoundError):
+    def __init__(self, company_ids):
+        super().__init__(f"Companies not found: {', '.join(company_ids)}")
+        self.company_ids = company_ids
+
 
-def create_company(db: Session, company: CompanyCreate) -> Company:
+async def create_company(db: AsyncSession, company: CompanyCreate) -> Company:
     db_company = Company(**company.model_dump())
     db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    await db.commit()
+    # Load users now, relationships cannot be lazy loaded on an async session
+    await db.refresh(db_company, attribute_names=["users"])
     return db_company
 
-def get_all_companies(db: Session):
+async def get_all_companies(db: AsyncSession):
     """
     Fetch all companies from the database.
     """
-    return db.query(Company).all()
+    result = await db.execute(select(Company).options(selectinload(Company.users)))
+    return result.scalars().all()
+
+
+async def set_company_factors(db: AsyncSession, factor_weights: dict):
+    """
+    Set the weights of factors for one or more companies and activate them, in one
+    transaction whatever the number of companies and factors.
+
+    Companies and factors are each checked with one IN query and the existing rows are
+    loaded with one more, then every row is written by a single upsert against the
+    unique (company_id, factor_id) index. The caller invalidates the companies' cached
+    weights and starts their re-scoring.
+
+    Args:
+        factor_weights (dict): Weight by factor_id, by company_id. The last weight given
+            for a factor wins.
+
+    Returns:
+        dict: Numbers of rows created and updated.
+
+    Raises:
+        CompaniesNotFoundError: If any company does not exist.
+        FactorsNotFoundError: If any factor does not exist.
+    """
+    company_ids = list(factor_weights)
+    factor_ids = list(dict.fromkeys(factor_id for weights in factor_weights.values() for factor_id in weights))
+
+    found = set(await db.scalars(select(Company.company_id).where(Company.company_id.in_(company_ids))))
+    missing = [company_id for company_id in company_ids if company_id not in found]
+    if missing:
+        raise CompaniesNotFoundError(missing)
+
+    found = set(await db.scalars(select(Factor.factor_id).where(Factor.factor_id.in_(factor_ids))))
+    missing = [factor_id for factor_id in factor_ids if factor_id not in found]
+    if missing:
+        raise FactorsNotFoundError(missing)
+
+    existing = {
+        (company_id, factor_id): company_factor_id
+        for company_id, factor_id, company_factor_id in await db.execute(
+            select(CompanyFactor.company_id, CompanyFactor.factor_id, CompanyFactor.company_factor_id)
+            .where(CompanyFactor.company_id.in_(company_ids), CompanyFactor.factor_id.in_(factor_ids))
+        )
+    }
+
+    now = datetime.utcnow()
+    rows = [
+        {"company_id": company_id, "factor_id": factor_id, "weightage": weightage, "is_active": True, "updated_at": now}
+        for company_id, weights in factor_weights.items()
+        for factor_id, weightage in weights.items()
+    ]
+    created = sum((row["company_id"], row["factor_id"]) not in existing for row in rows)
+    if rows:
+        await _upsert_company_factors(db, rows, existing)
+    await db.commit()
+    return {"created": created, "updated": len(rows) - created}
+
+
+async def _upsert_company_factors(db: AsyncSession, rows, existing):
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        statement = mysql_insert(CompanyFactor)
+        statement = statement.on_duplicate_key_update(
+            weightage=statement.inserted.weightage,
+            is_active=statement.inserted.is_active,
+            updated_at=statement.inserted.updated_at,
+        )
+        await db.execute(statement, rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+        statement = sqlite_insert(CompanyFactor)
+        statement = statement.on_conflict_do_update(
+            index_elements=[CompanyFactor.company_id, CompanyFactor.factor_id],
+            set_={
+                "weightage": statement.excluded.weightage,
+                "is_active": statement.excluded.is_active,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        await db.execute(statement, rows)
+    else:
+        # Without a native upsert, update the rows loaded as existing and insert the rest
+        updates = [
+            dict(row, company_factor_id=existing[(row["company_id"], row["factor_id"])])
+            for row in rows if (row["company_id"], row["factor_id"]) in existing
+        ]
+        inserts = [row for row in rows if (row["company_id"], row["factor_id"]) not in existing]
+        if updates:
+            await db.execute(update(CompanyFactor), updates)
+        if inserts:
+            await db.execute(insert(CompanyFactor), inserts)
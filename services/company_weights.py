@@ -0,0 +1,111 @@
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.company import Company, CompanyFactor
+from models.factor import Factor
+
+# Weight of a feature the company has not configured
+DEFAULT_WEIGHT = 1.0
+
+
+class CompanyNotFoundError(LookupError):
+    pass
+
+
+class CompanyWeights:
+    """
+    A company's factor weights compiled into dense vectors aligned with the model columns.
+    """
+
+    def __init__(self, numerical_columns, categorical_columns, numerical, categorical):
+        self.columns = (tuple(numerical_columns), tuple(categorical_columns))
+        self.numerical = numerical
+        self.categorical = categorical
+        self.loaded_at = time.monotonic()
+
+
+class CompanyWeightProvider:
+    """
+    In-memory cache of compiled company weights.
+
+    Entries are built from the company's active CompanyFactor rows on first use and
+    dropped by invalidate() when the company's factors change. The TTL bounds how long
+    another worker process can serve weights that were changed elsewhere.
+
+    Every invalidation bumps the company's generation; weights compiled while it changed
+    are returned to their caller but not cached, since they may predate the change.
+    """
+
+    def __init__(self, ttl_seconds=0):
+        self.ttl_seconds = ttl_seconds
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._generations = {}
+        # Bumped by clear(), which invalidates every company at once
+        self._epoch = 0
+
+    def get(self, db: Session, company_id: str, numerical_columns, categorical_columns):
+        """
+        Return the company's numerical and categorical weight vectors for the given columns.
+        """
+        columns = (tuple(numerical_columns), tuple(categorical_columns))
+
+        entry = self._cache.get(company_id)
+        if entry is None or entry.columns != columns or self._expired(entry):
+            generation = self._generation(company_id)
+            entry = compile_company_weights(db, company_id, numerical_columns, categorical_columns)
+            with self._lock:
+                if self._generation(company_id) == generation:
+                    self._cache[company_id] = entry
+
+        return entry.numerical, entry.categorical
+
+    def invalidate(self, company_id: str):
+        with self._lock:
+            self._generations[company_id] = self._generations.get(company_id, 0) + 1
+            self._cache.pop(company_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._cache.clear()
+
+    def _generation(self, company_id):
+        return self._epoch, self._generations.get(company_id, 0)
+
+    def _expired(self, entry):
+        return self.ttl_seconds > 0 and time.monotonic() - entry.loaded_at > self.ttl_seconds
+
+
+def compile_company_weights(db: Session, company_id: str, numerical_columns, categorical_columns):
+    """
+    Compile a company's active CompanyFactor rows into weight vectors. Factors are matched
+    to model columns by name; columns without an active factor get DEFAULT_WEIGHT.
+    """
+    company = db.query(Company.company_id).filter(Company.company_id == company_id).first()
+    if not company:
+        raise CompanyNotFoundError("Company not found")
+
+    rows = (
+        db.query(Factor.factor_name, CompanyFactor.weightage)
+        .join(CompanyFactor, CompanyFactor.factor_id == Factor.factor_id)
+        .filter(CompanyFactor.company_id == company_id, CompanyFactor.is_active.is_(True))
+        .all()
+    )
+    weightage = dict(rows)
+
+    numerical = np.array([weightage.get(col, DEFAULT_WEIGHT) for col in numerical_columns], dtype=float)
+    categorical = np.array([weightage.get(col, DEFAULT_WEIGHT) for col in categorical_columns], dtype=float)
+
+    # Shared between requests, so never modified in place
+    numerical.setflags(write=False)
+    categorical.setflags(write=False)
+
+    return CompanyWeights(numerical_columns, categorical_columns, numerical, categorical)
+
+
+company_weights = CompanyWeightProvider(ttl_seconds=settings.COMPANY_WEIGHTS_CACHE_TTL_SECONDS)
@@ -1,6 +1,7 @@
 import logging
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.factor import Factor
 from schemas.factor import FactorCreate
@@ -9,16 +10,17 @@ logger = logging.getLogger("log")
 
 
 
-def create_factor(db: Session, factor: FactorCreate) -> Factor:
+async def create_factor(db: AsyncSession, factor: FactorCreate) -> Factor:
     db_company = Factor(**factor.model_dump())
     db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    await db.commit()
+    await db.refresh(db_company)
     return db_company
 
-def get_all_factors(db: Session):
+async def get_all_factors(db: AsyncSession):
     """
     Fetch all factors from the database.
     """
-    return db.query(Factor).all()
+    result = await db.execute(select(Factor))
+    return result.scalars().all()
 
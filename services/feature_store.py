@@ -0,0 +1,287 @@
+import hashlib
+import logging
+import math
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from models.factor import Factor
+from models.feature import CandidateFeatures
+from models.models import Candidate, CandidateFactor
+from services.model_serving import model_server
+
+# predict/scripts is on sys.path, see services/__init__.py
+from model_bundle import get_model_bundle
+from predict import align_with_model_columns
+
+logger = logging.getLogger("log")
+
+# Candidate columns that map directly onto model features
+CANDIDATE_FEATURE_COLUMNS = {
+    "Candidate_Location": "location",
+    "Current_Role": "current_role",
+    "Experience_Years": "experience_years",
+}
+
+
+class CandidatesNotFoundError(LookupError):
+    def __init__(self, candidate_ids):
+        super().__init__(f"Candidates not found: {', '.join(candidate_ids)}")
+        self.candidate_ids = candidate_ids
+
+
+class FactorsNotFoundError(LookupError):
+    def __init__(self, factor_ids):
+        super().__init__(f"Factors not found: {', '.join(factor_ids)}")
+        self.factor_ids = factor_ids
+
+
+def layout_version(bundle) -> str:
+    """
+    Identifier of the model's column layout; stored rows are only valid for the layout
+    they were cast for.
+    """
+    layout = "\x1f".join(bundle.categorical_columns) + "\x1e" + "\x1f".join(bundle.numerical_columns)
+    return hashlib.blake2b(layout.encode(), digest_size=8).hexdigest()
+
+
+def pivot_candidate_features(db: Session, candidate_ids, bundle):
+    """
+    Pivot the Candidate records and their CandidateFactor rows into one typed feature
+    dict per candidate. Numerical model columns become floats (None when missing or
+    unparsable), the other model columns strings; factors the model does not use are dropped.
+    """
+    candidates = db.query(Candidate).filter(Candidate.candidate_id.in_(candidate_ids)).all()
+    found = {candidate.candidate_id: candidate for candidate in candidates}
+    missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in found]
+    if missing:
+        raise CandidatesNotFoundError(missing)
+
+    rows = {candidate_id: {} for candidate_id in candidate_ids}
+    for candidate_id, candidate in found.items():
+        for feature, attribute in CANDIDATE_FEATURE_COLUMNS.items():
+            rows[candidate_id][feature] = getattr(candidate, attribute)
+
+    # Explicit factor values take precedence over the candidate profile
+    factor_values = (
+        db.query(CandidateFactor.candidate_id, Factor.factor_name, CandidateFactor.factor_value)
+        .join(Factor, Factor.factor_id == CandidateFactor.factor_id)
+        .filter(CandidateFactor.candidate_id.in_(candidate_ids))
+        .order_by(CandidateFactor.created_at)
+        .all()
+    )
+    for candidate_id, factor_name, factor_value in factor_values:
+        rows[candidate_id][factor_name] = factor_value
+
+    numerical_columns = set(bundle.numerical_columns)
+    feature_columns = set(bundle.feature_names)
+    return {
+        candidate_id: {
+            name: _to_float(value) if name in numerical_columns else _to_str(value)
+            for name, value in row.items()
+            if name in feature_columns
+        }
+        for candidate_id, row in rows.items()
+    }
+
+
+def refresh_candidate_features(db: Session, candidate_ids, model_path=None):
+    """
+    Rebuild the materialized feature rows of the candidates for the columns of the given
+    model, the served one by default. The caller commits.
+
+    Returns:
+        dict: The new typed feature dict of every candidate.
+    """
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    if not candidate_ids:
+        return {}
+
+    bundle = get_model_bundle(model_path or model_server.model_path)
+    features = pivot_candidate_features(db, candidate_ids, bundle)
+    version = layout_version(bundle)
+    now = datetime.utcnow()
+    _upsert_features(db, [
+        {"candidate_id": candidate_id, "features": values, "layout_version": version, "updated_at": now}
+        for candidate_id, values in features.items()
+    ])
+    return features
+
+
+def rebuild_candidate_features(candidate_ids):
+    """
+    Refresh and commit the candidates' feature rows in a session of their own, e.g. as a
+    background task after the request that changed them. Rows that cannot be rebuilt are
+    left for load_feature_frame to build on their next read.
+    """
+    db = SessionLocal()
+    try:
+        refresh_candidate_features(db, candidate_ids)
+        db.commit()
+    except Exception:
+        logger.exception("Rebuilding the feature rows of %d candidates failed", len(candidate_ids))
+        db.rollback()
+    finally:
+        db.close()
+
+
+def invalidate_candidate_features(db: Session, candidate_ids):
+    """
+    Drop the materialized rows of the candidates; they are rebuilt on their next read.
+    The caller commits.
+    """
+    db.execute(delete(CandidateFeatures).where(CandidateFeatures.candidate_id.in_(list(candidate_ids))))
+
+
+def load_feature_frame(db: Session, candidate_ids, model_path=None):
+    """
+    Model input rows of the candidates, aligned with the columns of the given model, the
+    served one by default.
+
+    Rows come from the candidate_features table. Candidates without a row, or with a
+    row cast for another column layout, are pivoted once and stored, so later reads skip
+    the pivot. They are written and committed in a session of their own: the caller's
+    session is only read from and its transaction is left to the caller.
+
+    Raises:
+        CandidatesNotFoundError: If any candidate does not exist.
+    """
+    model_path = model_path or model_server.model_path
+    bundle = get_model_bundle(model_path)
+    version = layout_version(bundle)
+
+    stored = dict(
+        db.query(CandidateFeatures.candidate_id, CandidateFeatures.features)
+        .filter(CandidateFeatures.candidate_id.in_(candidate_ids), CandidateFeatures.layout_version == version)
+        .all()
+    )
+    missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in stored]
+    if missing:
+        # Committed right away so the rows are not held locked while the caller scores them
+        with Session(db.get_bind()) as writer:
+            stored.update(refresh_candidate_features(writer, missing, model_path=model_path))
+            writer.commit()
+
+    # A feature a candidate has no value for takes the training default, the same as a
+    # column absent from the whole batch, so a row never depends on the rows scored with it
+    defaults = bundle.schema.defaults
+    frame = pd.DataFrame([{**defaults, **stored[candidate_id]} for candidate_id in candidate_ids])
+    return align_with_model_columns(frame, model_path=model_path)
+
+
+def set_candidate_factors(db: Session, candidate_id: str, factor_values: dict):
+    """
+    Replace the candidate's values for the given factors and refresh its feature row.
+
+    Args:
+        factor_values (dict): New value by factor_id.
+
+    Returns:
+        dict: The candidate's new typed feature dict.
+    """
+    if db.query(Candidate.candidate_id).filter(Candidate.candidate_id == candidate_id).first() is None:
+        raise CandidatesNotFoundError([candidate_id])
+
+    factor_ids = list(factor_values)
+    found = {factor_id for (factor_id,) in db.query(Factor.factor_id).filter(Factor.factor_id.in_(factor_ids))}
+    missing = [factor_id for factor_id in factor_ids if factor_id not in found]
+    if missing:
+        raise FactorsNotFoundError(missing)
+
+    db.execute(delete(CandidateFactor).where(
+        CandidateFactor.candidate_id == candidate_id, CandidateFactor.factor_id.in_(factor_ids)
+    ))
+    db.add_all([
+        CandidateFactor(candidate_id=candidate_id, factor_id=factor_id, factor_value=str(value))
+        for factor_id, value in factor_values.items()
+    ])
+    db.flush()
+
+    features = refresh_candidate_features(db, [candidate_id])
+    db.commit()
+    return features[candidate_id]
+
+
+def export_feature_snapshot(db: Session, output_path: str, chunk_size: int = 10000):
+    """
+    Write the aligned feature rows of every candidate to a Parquet file, with a leading
+    candidate_id column, for offline bulk scoring (predict/scripts/bulk_score.py --id-column candidate_id).
+
+    Returns:
+        int: Rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    last_candidate_id = None
+    try:
+        while True:
+            query = db.query(Candidate.candidate_id)
+            if last_candidate_id is not None:
+                query = query.filter(Candidate.candidate_id > last_candidate_id)
+            candidate_ids = [candidate_id for (candidate_id,) in
+                             query.order_by(Candidate.candidate_id).limit(chunk_size)]
+            if not candidate_ids:
+                break
+
+            frame = load_feature_frame(db, candidate_ids)
+            frame.insert(0, "candidate_id", candidate_ids)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+
+            rows += len(candidate_ids)
+            last_candidate_id = candidate_ids[-1]
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _upsert_features(db: Session, rows):
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        statement = mysql_insert(CandidateFeatures)
+        statement = statement.on_duplicate_key_update(
+            features=statement.inserted.features,
+            layout_version=statement.inserted.layout_version,
+            updated_at=statement.inserted.updated_at,
+        )
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        statement = sqlite_insert(CandidateFeatures)
+        statement = statement.on_conflict_do_update(
+            index_elements=[CandidateFeatures.candidate_id],
+            set_={
+                "features": statement.excluded.features,
+                "layout_version": statement.excluded.layout_version,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    else:
+        invalidate_candidate_features(db, [row["candidate_id"] for row in rows])
+        statement = insert(CandidateFeatures)
+    db.execute(statement, rows)
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _to_str(value):
+    return None if value is None else str(value)
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("log")
+
+
+class SchedulerQueueFullError(Exception):
+    pass
+
+
+class _PendingRequest:
+    __slots__ = ("data", "numerical_weights", "categorical_weights", "context", "future", "enqueued_at")
+
+    def __init__(self, data, numerical_weights, categorical_weights, context, future, enqueued_at):
+        self.data = data
+        self.numerical_weights = numerical_weights
+        self.categorical_weights = categorical_weights
+        self.context = context
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class InferenceScheduler:
+    """
+    Coalesces concurrent scoring requests into micro-batches.
+
+    Requests are queued and flushed as one batch as soon as either max_batch_size rows
+    are waiting or the oldest request has waited max_wait_ms. Each batch is scored with
+    a single call to score_fn on the executor and every caller gets its own rows back.
+    Requests from different companies can share a batch since weights are applied per row;
+    requests with different contexts (e.g. model versions) never do, the context is
+    passed to score_fn with the batch.
+    """
+
+    def __init__(self, score_fn, executor, max_batch_size=64, max_wait_ms=5.0, max_queue_size=1000,
+                 max_concurrent_batches=1, stats_window=1000):
+        self.score_fn = score_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.max_concurrent_batches = max_concurrent_batches
+
+        self._pending = deque()
+        self._pending_rows = 0
+        self._loop = None
+        self._worker = None
+
+        # Statistics
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._total_batches = 0
+        self._total_requests = 0
+        self._total_rows = 0
+        self._rejected = 0
+        self._failed_batches = 0
+
+    async def submit(self, data, numerical_weights, categorical_weights, context=None):
+        """
+        Queue rows for scoring and wait for their results.
+
+        Args:
+            data (pd.DataFrame): Aligned candidate rows.
+            numerical_weights (np.array): Weights for the numerical columns of data.
+            categorical_weights (np.array): Weights for the categorical columns of data.
+            context: Passed to score_fn; only requests with equal contexts are batched together.
+
+        Returns:
+            pd.DataFrame: Expected joining score and summary for each row of data.
+        """
+        self._ensure_started()
+
+        if len(self._pending) >= self.max_queue_size:
+            self._rejected += 1
+            raise SchedulerQueueFullError("Prediction queue is full, try again later")
+
+        future = self._loop.create_future()
+        self._pending.append(_PendingRequest(data, numerical_weights, categorical_weights, context, future, time.monotonic()))
+        self._pending_rows += len(data)
+
+        self._not_empty.set()
+        if self._pending_rows >= self.max_batch_size:
+            self._full.set()
+
+        return await future
+
+    def stats(self):
+        """
+        Batch size and queue wait statistics over the most recent batches and requests.
+        """
+        batch_sizes = np.array(self._batch_sizes, dtype=float)
+        queue_waits = np.array(self._queue_waits, dtype=float) * 1000
+
+        return {
+            "queue_depth": len(self._pending),
+            "total_batches": self._total_batches,
+            "total_requests": self._total_requests,
+            "total_rows": self._total_rows,
+            "rejected_requests": self._rejected,
+            "failed_batches": self._failed_batches,
+            "batch_size": _summarize(batch_sizes),
+            "queue_wait_ms": _summarize(queue_waits),
+        }
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+
+        # Events and semaphores are bound to the loop they are used in
+        self._loop = loop
+        self._not_empty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._batch_slots = asyncio.Semaphore(self.max_concurrent_batches)
+        if self._pending:
+            self._not_empty.set()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # Do not collect a new batch until an executor slot is free; requests keep
+            # queueing meanwhile, so batches grow with load
+            await self._batch_slots.acquire()
+            try:
+                batch = await self._collect()
+            except asyncio.CancelledError:
+                self._batch_slots.release()
+                raise
+
+            task = self._loop.create_task(self._flush(batch))
+            task.add_done_callback(lambda _: self._batch_slots.release())
+
+    async def _collect(self):
+        await self._not_empty.wait()
+
+        deadline = self._pending[0].enqueued_at + self.max_wait
+        remaining = deadline - time.monotonic()
+        if self._pending_rows < self.max_batch_size and remaining > 0:
+            self._full.clear()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        batch = []
+        rows = 0
+        while self._pending and (not batch or (rows + len(self._pending[0].data) <= self.max_batch_size
+                                               and self._pending[0].context == batch[0].context)):
+            request = self._pending.popleft()
+            self._pending_rows -= len(request.data)
+            # Callers that gave up while queued are dropped
+            if not request.future.done():
+                batch.append(request)
+                rows += len(request.data)
+
+        if not self._pending:
+            self._not_empty.clear()
+        if self._pending_rows < self.max_batch_size:
+            self._full.clear()
+
+        return batch
+
+    async def _flush(self, batch):
+        if not batch:
+            return
+
+        flushed_at = time.monotonic()
+        lengths = [len(request.data) for request in batch]
+        data = pd.concat([request.data for request in batch], ignore_index=True)
+        numerical_weights = np.vstack([
+            np.broadcast_to(request.numerical_weights, (length, len(request.numerical_weights)))
+            for request, length in zip(batch, lengths)
+        ])
+        categorical_weights = np.vstack([
+            np.broadcast_to(request.categorical_weights, (length, len(request.categorical_weights)))
+            for request, length in zip(batch, lengths)
+        ])
+
+        self._total_batches += 1
+        self._total_requests += len(batch)
+        self._total_rows += len(data)
+        self._batch_sizes.append(len(data))
+        self._queue_waits.extend(flushed_at - request.enqueued_at for request in batch)
+
+        try:
+            result = await self._loop.run_in_executor(
+                self.executor, self.score_fn, data, numerical_weights, categorical_weights, batch[0].context
+            )
+        except Exception as e:
+            self._failed_batches += 1
+            logger.exception("Scoring a batch of %d rows failed", len(data))
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        start = 0
+        for request, length in zip(batch, lengths):
+            if not request.future.done():
+                request.future.set_result(result.iloc[start:start + length].reset_index(drop=True))
+            start += length
+
+
+def _summarize(values):
+    if len(values) == 0:
+        return {"mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": float(values.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(values.max()),
+    }
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import settings
+
+# predict/scripts is on sys.path, see services/__init__.py
+from model_bundle import evict_model_bundles, get_model_bundle, resolve_artifact_path
+from model_registry import ModelRegistry, ModelVersionNotFoundError
+
+logger = logging.getLogger("log")
+
+
+class ModelServer:
+    """
+    The model version the API scores with.
+
+    Requests read model_path once and pass it along, so each one is served from start to
+    end by a single version. Switching to another registry version loads and warms up its
+    bundle while the current one keeps serving, then replaces the active (version, path)
+    pair in one assignment: new requests get the new version, in-flight ones finish on
+    the old one, whose bundle stays cached until the next switch.
+
+    Without a CURRENT version in the registry, the flat model at fallback_model_path is served.
+    """
+
+    def __init__(self, registry, model_name, fallback_model_path):
+        self.registry = registry
+        self.model_name = model_name
+        self._active = (None, resolve_artifact_path(fallback_model_path))
+        self._activated_at = None
+        # Serializes loads; requests never take it
+        self._switch_lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._active[0]
+
+    @property
+    def model_path(self):
+        return self._active[1]
+
+    def status(self):
+        version, model_path = self._active
+        return {
+            "model_name": self.model_name,
+            "active_version": version,
+            "current_version": self.registry.current_version(self.model_name),
+            "model_path": model_path,
+            "activated_at": self._activated_at,
+        }
+
+    def activate(self, version):
+        """
+        Load and warm up a registry version, then switch new requests to it.
+
+        Raises:
+            ModelVersionNotFoundError: If the version was never published.
+        """
+        with self._switch_lock:
+            if version == self.version:
+                return False
+
+            model_path = self.registry.model_path(self.model_name, version)
+            start = datetime.utcnow()
+            get_model_bundle(model_path).warm_up(settings.PREDICTION_EXPLANATION)
+
+            previous_path = self.model_path
+            self._active = (version, model_path)
+            self._activated_at = datetime.utcnow()
+            # Keep the previous bundle for requests that started before the switch
+            evict_model_bundles([model_path, previous_path])
+
+        logger.info("Serving model %s version %s, loaded in %.2fs", self.model_name, version,
+                    (self._activated_at - start).total_seconds())
+        return True
+
+    def promote(self, version):
+        """
+        Switch this process to a version and point the registry's CURRENT at it, so the
+        other API processes follow on their next refresh.
+        """
+        self.activate(version)
+        self.registry.set_current(self.model_name, version)
+
+    def refresh(self):
+        """
+        Switch to the registry's CURRENT version if it changed.
+        """
+        version = self.registry.current_version(self.model_name)
+        if version is None:
+            return False
+        return self.activate(version)
+
+    async def watch(self, interval_seconds):
+        """
+        Follow the registry's CURRENT pointer until cancelled, loading new versions off the event loop.
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await run_in_threadpool(self.refresh)
+            except Exception:
+                logger.exception("Switching model %s to the current registry version failed", self.model_name)
+
+
+model_server = ModelServer(
+    ModelRegistry(settings.MODEL_REGISTRY_DIR),
+    settings.MODEL_REGISTRY_MODEL_NAME,
+    settings.PREDICTION_MODEL_PATH,
+)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models.models import Candidate
+from models.prediction import CandidateOutcome
+from services.prediction import build_feature_frame
+
+# Column of the exported rows holding the outcome, the target the trainer reads
+OUTCOME_COLUMN = "Expected_Joining_Score"
+
+
+class CandidateNotFoundError(LookupError):
+    pass
+
+
+def record_outcome(db: Session, candidate_id: str, expected_joining_score: float) -> CandidateOutcome:
+    """
+    Store the observed joining score of a candidate so the next incremental model
+    update can learn from it.
+    """
+    if db.query(Candidate.candidate_id).filter(Candidate.candidate_id == candidate_id).first() is None:
+        raise CandidateNotFoundError(f"Candidate not found: {candidate_id}")
+
+    outcome = CandidateOutcome(candidate_id=candidate_id, score=expected_joining_score)
+    db.add(outcome)
+    db.commit()
+    db.refresh(outcome)
+    return outcome
+
+
+def export_outcomes(db: Session, since: Optional[datetime] = None):
+    """
+    Build the labeled training rows for outcomes recorded after `since`.
+
+    Every candidate appears once, with its model feature row and its latest outcome,
+    in the column layout the incremental trainer reads.
+
+    Returns:
+        pd.DataFrame: Feature columns followed by Expected_Joining_Score.
+    """
+    query = db.query(CandidateOutcome.candidate_id, CandidateOutcome.score)
+    if since is not None:
+        query = query.filter(CandidateOutcome.observed_at > since)
+
+    # Later outcomes replace earlier ones
+    outcomes = {}
+    for candidate_id, score in query.order_by(CandidateOutcome.observed_at):
+        outcomes[candidate_id] = score
+
+    candidate_ids = list(outcomes)
+    data = build_feature_frame(db, candidate_ids)
+    data[OUTCOME_COLUMN] = [outcomes[candidate_id] for candidate_id in candidate_ids]
+    return data
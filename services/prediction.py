@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.models import Candidate, CandidateStatus
+from models.prediction import CandidatePrediction
+from services.company_weights import company_weights
+from services.feature_store import CandidatesNotFoundError, load_feature_frame
+from services.inference_scheduler import InferenceScheduler, SchedulerQueueFullError
+from services.model_serving import model_server
+
+# predict/scripts is on sys.path, see services/__init__.py
+from model_bundle import get_model_bundle
+from predict import fill_cached_predictions, lookup_cached_predictions, score_with_weights
+from prediction_cache import PredictionCache
+
+logger = logging.getLogger("log")
+
+# Sklearn and SHAP work runs here so it never occupies the event loop or the threadpool
+# FastAPI uses for sync dependencies and DB access
+_executor = ThreadPoolExecutor(max_workers=settings.PREDICTION_MAX_WORKERS, thread_name_prefix="prediction")
+_slots = asyncio.Semaphore(settings.PREDICTION_MAX_CONCURRENCY)
+
+
+def _score(data, numerical_weights, categorical_weights, model_path):
+    return score_with_weights(data, numerical_weights, categorical_weights, model_path=model_path,
+                              explanation=settings.PREDICTION_EXPLANATION)
+
+
+# Unchanged candidates are served from here without touching sklearn or SHAP
+prediction_cache = PredictionCache(
+    max_size=settings.PREDICTION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    path=settings.PREDICTION_CACHE_PATH,
+    max_disk_size=settings.PREDICTION_CACHE_MAX_DISK_SIZE,
+)
+
+# Concurrent single-candidate requests are coalesced into micro-batches
+scheduler = InferenceScheduler(
+    _score,
+    _executor,
+    max_batch_size=settings.PREDICTION_SCHEDULER_MAX_BATCH_SIZE,
+    max_wait_ms=settings.PREDICTION_SCHEDULER_MAX_WAIT_MS,
+    max_queue_size=settings.PREDICTION_SCHEDULER_MAX_QUEUE_SIZE,
+    max_concurrent_batches=settings.PREDICTION_MAX_WORKERS,
+)
+
+
+class PredictionBusyError(Exception):
+    pass
+
+
+class PredictionTimeoutError(Exception):
+    pass
+
+
+def build_feature_frame(db: Session, candidate_ids, model_path=None):
+    """
+    Model input rows of the candidates, read from the feature store and aligned with
+    the columns of the given model (the served one by default).
+    """
+    return load_feature_frame(db, candidate_ids, model_path=model_path)
+
+
+def load_scoring_inputs(db: Session, company_id: str, candidate_ids, model_path: str):
+    """
+    Build the candidates' feature rows and weights and look them up in the prediction cache.
+    """
+    bundle = get_model_bundle(model_path)
+    numerical_weights, categorical_weights = company_weights.get(
+        db, company_id, bundle.numerical_columns, bundle.categorical_columns
+    )
+    data = build_feature_frame(db, candidate_ids, model_path=model_path)
+    keys, cached, missing = lookup_cached_predictions(
+        prediction_cache, data, numerical_weights, categorical_weights, model_path=model_path,
+        explanation=settings.PREDICTION_EXPLANATION,
+    )
+    return data.iloc[missing], numerical_weights, categorical_weights, bundle.version, (keys, cached, missing)
+
+
+def save_predictions(db: Session, company_id: str, candidate_ids, result, model_version: str):
+    """
+    Store the scores in candidate_predictions, replacing the candidates' previous scores
+    for the company, and mark the candidates as predicted. The caller commits.
+    """
+    now = datetime.utcnow()
+    _upsert_predictions(db, [
+        {
+            "prediction_id": str(uuid.uuid4()),
+            "candidate_id": candidate_id,
+            "company_id": company_id,
+            "expected_joining_score": float(score),
+            "summary": summary,
+            "model_version": model_version,
+            "created_at": now,
+        }
+        for candidate_id, score, summary in zip(candidate_ids, result["Expected_Joining_Score"], result["Summary"])
+    ])
+    db.query(Candidate).filter(Candidate.candidate_id.in_(candidate_ids)).update(
+        {Candidate.status: CandidateStatus.PredictionGenerated}, synchronize_session=False
+    )
+
+
+def _upsert_predictions(db: Session, rows):
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        statement = mysql_insert(CandidatePrediction)
+        statement = statement.on_duplicate_key_update(
+            expected_joining_score=statement.inserted.expected_joining_score,
+            summary=statement.inserted.summary,
+            model_version=statement.inserted.model_version,
+            created_at=statement.inserted.created_at,
+        )
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        statement = sqlite_insert(CandidatePrediction)
+        statement = statement.on_conflict_do_update(
+            index_elements=[CandidatePrediction.company_id, CandidatePrediction.candidate_id],
+            set_={
+                "expected_joining_score": statement.excluded.expected_joining_score,
+                "summary": statement.excluded.summary,
+                "model_version": statement.excluded.model_version,
+                "created_at": statement.excluded.created_at,
+            },
+        )
+    else:
+        for company_id in {row["company_id"] for row in rows}:
+            db.execute(delete(CandidatePrediction).where(
+                CandidatePrediction.company_id == company_id,
+                CandidatePrediction.candidate_id.in_([row["candidate_id"] for row in rows if row["company_id"] == company_id]),
+            ))
+        statement = insert(CandidatePrediction)
+    db.execute(statement, rows)
+
+
+def record_predictions(db: Session, company_id: str, candidate_ids, result, model_version: str):
+    save_predictions(db, company_id, candidate_ids, result, model_version)
+    db.commit()
+
+
+async def run_scoring(data, numerical_weights, categorical_weights, model_path):
+    """
+    Score a frame on the prediction executor, bounded by the concurrency limit and timeout.
+    """
+    timeout = settings.PREDICTION_TIMEOUT_SECONDS
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise PredictionBusyError("Prediction capacity exhausted, try again later")
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, _score, data, numerical_weights, categorical_weights, model_path)
+    # The slot is only freed once the worker thread is done, even if the caller gave up
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Prediction for %d candidates timed out after %.1fs", len(data), timeout)
+        raise PredictionTimeoutError("Prediction timed out")
+
+
+async def run_coalesced_scoring(data, numerical_weights, categorical_weights, model_path):
+    """
+    Score a frame through the micro-batching scheduler, bounded by the queue size and timeout.
+    """
+    timeout = settings.PREDICTION_TIMEOUT_SECONDS
+    try:
+        return await asyncio.wait_for(
+            scheduler.submit(data, numerical_weights, categorical_weights, context=model_path), timeout=timeout
+        )
+    except SchedulerQueueFullError as e:
+        raise PredictionBusyError(str(e))
+    except asyncio.TimeoutError:
+        logger.warning("Coalesced prediction for %d candidates timed out after %.1fs", len(data), timeout)
+        raise PredictionTimeoutError("Prediction timed out")
+
+
+async def predict_candidates(db: Session, company_id: str, candidate_ids, coalesce=False):
+    """
+    Score the given candidates with the company's weights and mark them as predicted.
+
+    Args:
+        coalesce (bool): Queue the rows on the micro-batching scheduler so they are scored
+            together with other concurrent requests.
+
+    Returns:
+        list: One dict per candidate with the score and its summary, in request order.
+    """
+    # Keep the request order but score each candidate once
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+
+    # The whole request uses the model served when it started, even if a new one is switched in meanwhile
+    model_path = model_server.model_path
+
+    data, numerical_weights, categorical_weights, model_version, (keys, cached, missing) = await run_in_threadpool(
+        load_scoring_inputs, db, company_id, candidate_ids, model_path
+    )
+
+    # Only candidates missing from the cache are scored
+    scored = None
+    if missing:
+        if coalesce:
+            scored = await run_coalesced_scoring(data, numerical_weights, categorical_weights, model_path)
+        else:
+            scored = await run_scoring(data, numerical_weights, categorical_weights, model_path)
+    # With PREDICTION_CACHE_PATH set, storing the new entries is a SQLite write and commit
+    result = await run_in_threadpool(fill_cached_predictions, prediction_cache, keys, cached, missing, scored)
+
+    await run_in_threadpool(record_predictions, db, company_id, candidate_ids, result, model_version)
+
+    return [
+        {
+            "candidate_id": candidate_id,
+            "expected_joining_score": float(score),
+            "summary": summary,
+        }
+        for candidate_id, score, summary in zip(
+            candidate_ids, result["Expected_Joining_Score"], result["Summary"]
+        )
+    ]
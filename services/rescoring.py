@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, update
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import SessionLocal
+from models.prediction import CandidatePrediction, RescoreJob, RescoreJobStatus
+from services.company_weights import company_weights
+from services.model_serving import model_server
+from services.prediction import build_feature_frame, get_model_bundle, save_predictions, score_with_weights
+
+logger = logging.getLogger("log")
+
+ACTIVE_STATUSES = (RescoreJobStatus.Pending, RescoreJobStatus.Running)
+
+# Jobs run one at a time, away from the request executors
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rescore")
+
+
+def start_rescore_job(db: Session, company_id: str) -> RescoreJob:
+    """
+    Queue a job re-scoring every candidate with a stored prediction for the company.
+    Active jobs for the same company are cancelled since they use outdated weights.
+    """
+    now = datetime.utcnow()
+    db.query(RescoreJob).filter(
+        RescoreJob.company_id == company_id, RescoreJob.status.in_(ACTIVE_STATUSES)
+    ).update({RescoreJob.status: RescoreJobStatus.Cancelled, RescoreJob.finished_at: now}, synchronize_session=False)
+
+    total = db.query(func.count()).filter(CandidatePrediction.company_id == company_id).scalar()
+    job = RescoreJob(company_id=company_id, status=RescoreJobStatus.Pending, total_candidates=total)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _executor.submit(run_rescore_job, job.job_id)
+    return job
+
+
+def _claimable(now):
+    # Pending jobs, and running jobs whose run stopped sending heartbeats
+    lease_expired = now - timedelta(seconds=settings.RESCORE_LEASE_SECONDS)
+    return or_(
+        RescoreJob.status == RescoreJobStatus.Pending,
+        and_(
+            RescoreJob.status == RescoreJobStatus.Running,
+            or_(RescoreJob.heartbeat_at.is_(None), RescoreJob.heartbeat_at < lease_expired),
+        ),
+    )
+
+
+def resume_rescore_jobs():
+    """
+    Resubmit jobs that are pending or were interrupted mid-run, e.g. by a restart.
+    Every API worker calls this; a job only runs in the worker that claims it.
+    """
+    db = SessionLocal()
+    try:
+        job_ids = [job_id for (job_id,) in db.query(RescoreJob.job_id).filter(_claimable(datetime.utcnow()))]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        logger.info("Resuming rescore job %s", job_id)
+        _executor.submit(run_rescore_job, job_id)
+
+
+async def watch_rescore_jobs(interval_seconds):
+    """
+    Resume claimable jobs until cancelled, so a job whose worker died is picked up once
+    its lease expires.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(resume_rescore_jobs)
+        except Exception:
+            logger.exception("Resuming rescore jobs failed")
+
+
+def get_rescore_job(db: Session, company_id: str, job_id: str):
+    return db.query(RescoreJob).filter(RescoreJob.job_id == job_id, RescoreJob.company_id == company_id).first()
+
+
+def describe_rescore_job(job: RescoreJob) -> dict:
+    """
+    Job progress including the throughput of the current (or last) run.
+    """
+    rows_per_second = None
+    if job.started_at is not None:
+        end = job.finished_at or job.updated_at or datetime.utcnow()
+        elapsed = (end - job.started_at).total_seconds()
+        processed = job.processed_candidates - job.processed_at_start
+        if elapsed > 0:
+            rows_per_second = processed / elapsed
+
+    return {
+        "job_id": job.job_id,
+        "company_id": job.company_id,
+        "status": job.status.value,
+        "total_candidates": job.total_candidates,
+        "processed_candidates": job.processed_candidates,
+        "rows_per_second": rows_per_second,
+        "model_version": job.model_version,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _claim(db: Session, job_id: str, claim: str) -> bool:
+    # One conditional UPDATE, so of several workers resuming the same job only one gets it
+    now = datetime.utcnow()
+    claimed = db.query(RescoreJob).filter(RescoreJob.job_id == job_id, _claimable(now)).update({
+        RescoreJob.status: RescoreJobStatus.Running,
+        RescoreJob.claimed_by: claim,
+        RescoreJob.heartbeat_at: now,
+        RescoreJob.started_at: now,
+        RescoreJob.processed_at_start: RescoreJob.processed_candidates,
+        RescoreJob.finished_at: None,
+    }, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def _update_claimed(db: Session, job_id: str, claim: str, values: dict) -> bool:
+    # Write the job only while this run still holds it: not cancelled, not taken over
+    now = datetime.utcnow()
+    updated = db.query(RescoreJob).filter(
+        RescoreJob.job_id == job_id,
+        RescoreJob.claimed_by == claim,
+        RescoreJob.status == RescoreJobStatus.Running,
+    ).update({**values, RescoreJob.heartbeat_at: now, RescoreJob.updated_at: now}, synchronize_session=False)
+    return updated == 1
+
+
+def run_rescore_job(job_id: str):
+    """
+    Score the job's candidates in fixed-size chunks. Every chunk is committed together
+    with the job cursor and a heartbeat, so an interrupted job resumes after its last
+    finished chunk. A chunk is rolled back when the job was cancelled or taken over
+    by another worker meanwhile.
+    """
+    claim = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id, claim):
+            return
+        job = db.get(RescoreJob, job_id)
+        # Progress is only written through _update_claimed, never flushed from the object
+        db.expunge(job)
+
+        while True:
+            candidate_ids = _next_chunk(db, job)
+            if not candidate_ids:
+                break
+
+            _rescore_chunk(db, job, candidate_ids)
+            job.last_candidate_id = candidate_ids[-1]
+            job.processed_candidates += len(candidate_ids)
+            if not _update_claimed(db, job_id, claim, {
+                RescoreJob.last_candidate_id: job.last_candidate_id,
+                RescoreJob.processed_candidates: job.processed_candidates,
+                RescoreJob.model_version: job.model_version,
+            }):
+                db.rollback()
+                return
+            db.commit()
+
+        if _update_claimed(db, job_id, claim, {
+            RescoreJob.status: RescoreJobStatus.Completed,
+            RescoreJob.finished_at: datetime.utcnow(),
+        }):
+            db.commit()
+    except Exception as e:
+        logger.exception("Rescore job %s failed", job_id)
+        db.rollback()
+        if _update_claimed(db, job_id, claim, {
+            RescoreJob.status: RescoreJobStatus.Failed,
+            RescoreJob.error: str(e),
+            RescoreJob.finished_at: datetime.utcnow(),
+        }):
+            db.commit()
+    finally:
+        db.close()
+
+
+def _next_chunk(db: Session, job: RescoreJob):
+    query = db.query(CandidatePrediction.candidate_id).filter(CandidatePrediction.company_id == job.company_id)
+    if job.last_candidate_id is not None:
+        query = query.filter(CandidatePrediction.candidate_id > job.last_candidate_id)
+    rows = query.order_by(CandidatePrediction.candidate_id).limit(settings.RESCORE_CHUNK_SIZE).all()
+    return [candidate_id for (candidate_id,) in rows]
+
+
+def _rescore_chunk(db: Session, job: RescoreJob, candidate_ids):
+    model_path = model_server.model_path
+    bundle = get_model_bundle(model_path)
+    numerical_weights, categorical_weights = company_weights.get(
+        db, job.company_id, bundle.numerical_columns, bundle.categorical_columns
+    )
+    data = build_feature_frame(db, candidate_ids, model_path=model_path)
+    result = score_with_weights(data, numerical_weights, categorical_weights, model_path=model_path,
+                                explanation=settings.PREDICTION_EXPLANATION)
+
+    save_predictions(db, job.company_id, candidate_ids, result, bundle.version)
+    job.model_version = bundle.version
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Settings are read on import; the services only need a database URL to build their engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
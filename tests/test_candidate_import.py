@@ -0,0 +1,45 @@
+import asyncio
+
+from services.candidate_import import iter_upload_rows
+
+HEADER = "name,email,location,current_role,experience_years,target_role,target_industry\r\n"
+
+
+async def _stream(data, chunk_size=7):
+    # Small chunks so records and quoted fields are split across reads
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def _csv_rows(text):
+    async def collect():
+        return [row async for row in iter_upload_rows(_stream(text.encode()), "csv")]
+
+    return asyncio.run(collect())
+
+
+def test_stray_quote_in_unquoted_field_does_not_swallow_following_rows():
+    rows = _csv_rows(
+        HEADER
+        + 'Sean O"Brien,sean@x.com,Pune,Engineer,3,Lead,IT\r\n'
+        + "".join(f"Person {i},p{i}@x.com,Delhi,Analyst,{i},Lead,IT\r\n" for i in range(3))
+    )
+
+    assert [row_number for row_number, _ in rows] == [1, 2, 3, 4]
+    assert rows[0][1]["name"] == 'Sean O"Brien'
+    assert [row["name"] for _, row in rows[1:]] == ["Person 0", "Person 1", "Person 2"]
+
+
+def test_quoted_field_spanning_lines_is_one_row():
+    rows = _csv_rows(HEADER + '"Multi\nLine, Jr",,Pune,"Eng ""A""",3,Lead,IT\r\nNext,,Delhi,Analyst,1,Lead,IT\r\n')
+
+    assert [row["name"] for _, row in rows] == ["Multi\nLine, Jr", "Next"]
+    assert rows[0][1]["current_role"] == 'Eng "A"'
+    assert "email" not in rows[0][1]
+
+
+def test_unterminated_quoted_field_is_reported():
+    rows = _csv_rows(HEADER + 'Valid,,Pune,Engineer,3,Lead,IT\r\n"Open,,Pune\r\nmore\r\n')
+
+    assert rows[0][1]["name"] == "Valid"
+    assert rows[1] == (2, "Unterminated quoted field")